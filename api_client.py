@@ -0,0 +1,170 @@
+"""
+Shared HTTP client for the OMDb API
+
+One requests.Session with a keep-alive connection pool is reused by all
+API calls. Every request has connect/read timeouts, 5xx responses and
+connection errors are retried with exponential backoff and full jitter,
+and a circuit breaker fails fast after repeated failures so a dead API
+does not stall the CLI. Call configure() to change any of the settings.
+"""
+
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Seconds to wait for a connection / for response data
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+# Retries after the first attempt, and the backoff window in seconds
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+# Keep-alive connections kept per host
+POOL_SIZE = 16
+# Consecutive failed requests before the breaker opens, and how long it
+# stays open before letting a trial request through
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without contacting the API while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Counts consecutive failures and opens after `threshold` of them"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise CircuitOpenError while open; after the cooldown let a
+        single trial request through (half-open)"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"API unavailable, retrying in {remaining:.0f}s"
+                )
+            # Half-open: the next failure re-opens it immediately
+            self._opened_at = None
+            self._failures = self.threshold - 1
+
+    def record_success(self):
+        """Close the circuit"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        """Count a failure and open the circuit at the threshold"""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+
+class HttpClient:
+    """Pooled session with timeouts, retries and a circuit breaker"""
+
+    def __init__(
+        self,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        max_retries=MAX_RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        pool_size=POOL_SIZE,
+        breaker=None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt):
+        """Full jitter: uniform in [0, min(max, base * 2**attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def get(self, url, params=None, timeout=None, before_send=None):
+        """
+        Send a GET request, retrying transient failures.
+
+        Parameters:
+            url (str): Request URL
+            params (dict): Query string parameters
+            timeout: Overrides the (connect, read) timeout
+            before_send (callable): Called before every attempt,
+                retries included, e.g. to take a rate-limit token; an
+                exception it raises is passed on without retrying
+
+        Returns:
+            requests.Response: The first non-5xx response (4xx responses
+                are returned as is for the caller to raise_for_status)
+
+        Raises:
+            CircuitOpenError: While the API is considered down
+            requests.exceptions.RequestException: When all retries fail
+        """
+        self.breaker.before_request()
+
+        for attempt in range(self.max_retries + 1):
+            if before_send is not None:
+                before_send()
+            try:
+                response = self.session.get(
+                    url, params=params, timeout=timeout or self.timeout
+                )
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as e:
+                error = e
+            else:
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                    return response
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Server Error for url: {response.url}",
+                    response=response,
+                )
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt))
+
+        self.breaker.record_failure()
+        raise error
+
+
+client = HttpClient()
+
+
+def configure(**settings):
+    """Replace the shared client, e.g. configure(read_timeout=5)"""
+    global client
+    client.session.close()
+    client = HttpClient(**settings)
+    return client
+
+
+def get(url, params=None, timeout=None, before_send=None):
+    """GET through the shared client, see HttpClient.get"""
+    return client.get(url, params=params, timeout=timeout,
+                      before_send=before_send)
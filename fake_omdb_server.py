@@ -0,0 +1,285 @@
+"""
+Local stand-in for the OMDb API
+
+Serves the same JSON shape as http://www.omdbapi.com/ (Response, Title,
+Year, imdbRating, Poster, Error) so the add-movie and batch-enrichment
+paths can be tested and load-tested without a key or network access:
+
+    python fake_omdb_server.py --port 8765 --latency 0.05 --error-rate 0.01
+    OMDB_BASE_URL=http://127.0.0.1:8765/ python main.py enrich titles.txt
+    python fake_omdb_server.py --load-test 2000 --concurrency 16
+
+Answers come from a fixture file ({normalised title: OMDb JSON}) and
+unknown titles get a generated movie. With --record, unknown titles are
+fetched from the real API instead and saved into the fixture file, which
+later runs replay offline (use --replay-only to answer misses with
+"Movie not found!" instead of generating them).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import requests
+
+REAL_OMDB_URL = "http://www.omdbapi.com/"
+
+
+def normalize_title(title):
+    """Fixture key for a title"""
+    return " ".join(title.split()).casefold()
+
+
+def generated_movie(title):
+    """Deterministic made-up OMDb answer for a title"""
+    digest = int(hashlib.sha1(normalize_title(title).encode()).hexdigest(), 16)
+    return {
+        "Response": "True",
+        "Title": " ".join(title.split()).title(),
+        "Year": str(1920 + digest % 105),
+        "imdbRating": f"{1 + digest % 90 / 10:.1f}",
+        "Poster": f"https://example.invalid/posters/{digest % 100000}.jpg",
+    }
+
+
+class FakeOmdb:
+    """State shared by all request handlers of one server"""
+
+    def __init__(self, fixtures_path=None, latency=0.0, error_rate=0.0,
+                 rate_limit=None, record=False, replay_only=False, api_key=None):
+        self.fixtures_path = fixtures_path
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.record = record
+        self.replay_only = replay_only
+        self.api_key = api_key
+        self.fixtures = {}
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        if fixtures_path and os.path.exists(fixtures_path):
+            with open(fixtures_path, "r", encoding="utf-8") as fileobject:
+                self.fixtures = json.load(fileobject)
+
+    def _rate_limited(self):
+        """True if this request exceeds rate_limit requests per second"""
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count > self.rate_limit
+
+    def _save_fixtures(self):
+        with self._lock:
+            snapshot = dict(self.fixtures)
+        temp_path = f"{self.fixtures_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as fileobject:
+            json.dump(snapshot, fileobject, indent=2, sort_keys=True)
+        os.replace(temp_path, self.fixtures_path)
+
+    def lookup(self, title, year=None):
+        """OMDb JSON for a ?t= query, limited to a year with y="""
+        not_found = {"Response": "False", "Error": "Movie not found!"}
+        key = normalize_title(title)
+        if key in self.fixtures:
+            answer = self.fixtures[key]
+            if year and not answer.get("Year", "").startswith(year):
+                return not_found
+            return answer
+
+        if self.record:
+            params = {"t": title, "apikey": self.api_key}
+            if year:
+                params["y"] = year
+            answer = requests.get(REAL_OMDB_URL, params=params, timeout=10).json()
+            if year:
+                # Fixtures are keyed by title alone
+                return answer
+            with self._lock:
+                self.fixtures[key] = answer
+            if self.fixtures_path:
+                self._save_fixtures()
+            return answer
+
+        if self.replay_only:
+            return not_found
+        answer = generated_movie(title)
+        if year:
+            answer["Year"] = year
+        return answer
+
+    def search(self, query):
+        """OMDb JSON for a ?s= query, built from fixtures"""
+        needle = normalize_title(query)
+        matches = [
+            {"Title": answer["Title"], "Year": answer.get("Year", ""),
+             "Type": "movie", "Poster": answer.get("Poster", "N/A")}
+            for key, answer in self.fixtures.items()
+            if answer.get("Response") == "True" and needle in key
+        ]
+        if not matches:
+            return {"Response": "False", "Error": "Movie not found!"}
+        return {"Response": "True", "Search": matches[:10],
+                "totalResults": str(len(matches))}
+
+
+def make_handler(omdb):
+    """Request handler class bound to a FakeOmdb instance"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with omdb._lock:
+                omdb.requests_served += 1
+            if omdb.latency:
+                time.sleep(omdb.latency)
+
+            if omdb._rate_limited():
+                self._send(429, {"Response": "False",
+                                 "Error": "Request limit reached!"})
+                return
+            if omdb.error_rate and random.random() < omdb.error_rate:
+                self._send(503, {"Response": "False",
+                                 "Error": "Service unavailable"})
+                return
+
+            params = parse_qs(urlparse(self.path).query)
+            if omdb.api_key and not omdb.record and \
+                    params.get("apikey", [None])[0] != omdb.api_key:
+                self._send(401, {"Response": "False", "Error": "Invalid API key!"})
+            elif "t" in params:
+                self._send(200, omdb.lookup(params["t"][0],
+                                            params.get("y", [None])[0]))
+            elif "s" in params:
+                self._send(200, omdb.search(params["s"][0]))
+            else:
+                self._send(200, {"Response": "False",
+                                 "Error": "Incorrect IMDb ID."})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """
+    Start a fake OMDb server on a background thread.
+
+    Parameters:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free one
+        **options: FakeOmdb settings (latency, error_rate, rate_limit, ...)
+
+    Returns:
+        tuple: (server, base_url); call server.shutdown() to stop it
+    """
+    omdb = FakeOmdb(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(omdb))
+    server.daemon_threads = True
+    server.omdb = omdb
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+def run_load_test(count, concurrency, **options):
+    """
+    Enrich `count` made-up titles through movie_api against a fake server.
+
+    The API cache is pointed at a throwaway database so the run neither
+    reads nor pollutes data/api_cache.db, and the OMDb quota is lifted
+    so the server, not the client-side limiter, is what gets measured.
+    """
+    import tempfile
+    import movie_api
+    import rate_limiter
+    from storage import api_cache
+
+    server, base_url = start_server(**options)
+    movie_api.configure(base_url=base_url)
+    rate_limiter.scheduler = rate_limiter.TokenBucketScheduler(
+        rate_per_second=1e9, burst=10**9, daily_limit=10**9, persist=False
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        api_cache.CACHE_URL = f"sqlite:///{os.path.join(temp_dir, 'cache.db')}"
+        titles = [f"Load Test Movie {i}" for i in range(count)]
+
+        start = time.perf_counter()
+        results = movie_api.get_movies_from_api_batch(
+            titles, max_concurrency=concurrency
+        )
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    errors = sum(1 for item in results if item["error"])
+    print(
+        f"{count} lookups, concurrency {concurrency}: {elapsed:.2f}s "
+        f"({count / elapsed:.0f} req/s), {errors} errors, "
+        f"{server.omdb.requests_served} HTTP requests served"
+    )
+
+
+def main():
+    """Run the fake server in the foreground"""
+    parser = argparse.ArgumentParser(description="Local OMDb stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="JSON fixture file to replay/record")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 503")
+    parser.add_argument("--rate-limit", type=int,
+                        help="Requests per second before answering HTTP 429")
+    parser.add_argument("--record", action="store_true",
+                        help="Fetch unknown titles from OMDb and save them")
+    parser.add_argument("--replay-only", action="store_true",
+                        help="Answer unknown titles with 'Movie not found!'")
+    parser.add_argument("--api-key", default=os.getenv("OMDB_API_KEY"),
+                        help="Key to require (and to use when recording)")
+    parser.add_argument("--load-test", type=int, metavar="COUNT",
+                        help="Run COUNT batch lookups against the server and exit")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Lookups in flight during --load-test")
+    args = parser.parse_args()
+
+    if args.load_test:
+        run_load_test(
+            args.load_test, args.concurrency, host=args.host, port=0,
+            fixtures_path=args.fixtures, latency=args.latency,
+            error_rate=args.error_rate, rate_limit=args.rate_limit,
+        )
+        return
+
+    server, base_url = start_server(
+        args.host, args.port, fixtures_path=args.fixtures, latency=args.latency,
+        error_rate=args.error_rate, rate_limit=args.rate_limit,
+        record=args.record, replay_only=args.replay_only, api_key=args.api_key,
+    )
+    print(f"Fake OMDb API listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ Features:
 - Persistent storage using SQLite database for all movie data
 - Static HTML generation for displaying movies in a web page
 - Robust input validation, error handling, and user-friendly feedback
+- Bulk import of movies from CSV/JSONL files (python main.py import ...)
 
 This application integrates SQL, API fetching, and HTML generation
 to provide a modern and versatile personal movie management tool.
@@ -24,8 +25,15 @@ to provide a modern and versatile personal movie management tool.
 Intended for educational and personal use.
 """
 
+import argparse
+import sys
 from colorama import init
-from movie_helpers import welcome, get_user_choice, exit_app
+from movie_helpers import (
+    welcome,
+    get_user_choice,
+    exit_app,
+    save_pending_writes,
+)
 from movie_operations import (
     initialize_app_data,
     list_movies,
@@ -36,7 +44,17 @@ from movie_operations import (
     search_movie,
 )
 from movie_stats import stats, movies_sorted_by_rating, movies_sorted_by_year
-from website_generator import generate_website
+from website_generator import (
+    DEFAULT_PAGE_SIZE,
+    generate_website,
+    generate_paged_site,
+)
+from movie_import import import_movies_file
+from storage import movie_storage_sql as storage
+from storage import api_cache
+from movie_api import print_cache_stats, enrich_titles_from_file
+from refresh_job import refresh_stale_movies
+from poster_pipeline import download_posters
 
 # Initialize colorama
 init()
@@ -75,10 +93,211 @@ def control_logic():
         execute_user_action(user_choice, movies)
 
 
+def positive_int(value):
+    """argparse type for counts and sizes that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def build_arg_parser():
+    """Build the parser for the non-interactive commands"""
+    parser = argparse.ArgumentParser(description="Personal Movie Database")
+    parser.add_argument(
+        "--write-behind",
+        action="store_true",
+        help="Queue adds/updates/deletes and commit them in batches",
+    )
+    parser.add_argument(
+        "--flush-size",
+        type=positive_int,
+        default=500,
+        help="Write-behind: flush once this many titles are pending",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=2.0,
+        help="Write-behind: flush at least every this many seconds",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    import_parser = commands.add_parser(
+        "import", help="Bulk import movies from a CSV or JSONL file"
+    )
+    import_parser.add_argument("file", help="Path to a .csv or .jsonl file")
+    import_parser.add_argument(
+        "--on-duplicate",
+        choices=["skip", "upsert"],
+        default="skip",
+        help="What to do with titles already in the database",
+    )
+    import_parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=1000,
+        help="Rows written per transaction",
+    )
+
+    enrich_parser = commands.add_parser(
+        "enrich", help="Look up a file of titles (one per line) on OMDb"
+    )
+    enrich_parser.add_argument("file", help="Text file with one title per line")
+    enrich_parser.add_argument(
+        "--max-concurrency",
+        type=positive_int,
+        default=8,
+        help="Maximum number of requests in flight",
+    )
+    enrich_parser.add_argument(
+        "--add", action="store_true", help="Add the movies found to the database"
+    )
+
+    refresh_parser = commands.add_parser(
+        "refresh", help="Re-fetch OMDb data for movies not refreshed recently"
+    )
+    refresh_parser.add_argument(
+        "--max-age-days",
+        type=int,
+        default=30,
+        help="Refresh movies last fetched more than this many days ago",
+    )
+    refresh_parser.add_argument(
+        "--max-concurrency",
+        type=positive_int,
+        default=4,
+        help="Maximum number of requests in flight",
+    )
+    refresh_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=50,
+        help="Movies looked up and committed per batch",
+    )
+    refresh_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint of an interrupted run and start over",
+    )
+
+    posters_parser = commands.add_parser(
+        "posters", help="Download posters and build local thumbnails"
+    )
+    posters_parser.add_argument(
+        "--max-concurrency",
+        type=positive_int,
+        default=8,
+        help="Maximum number of downloads in flight",
+    )
+
+    site_parser = commands.add_parser(
+        "build-site", help="Generate the static website"
+    )
+    site_parser.add_argument(
+        "--paged",
+        action="store_true",
+        help="Write numbered pages plus decade and rating indexes "
+        "instead of a single movies.html",
+    )
+    page_options = site_parser.add_mutually_exclusive_group()
+    page_options.add_argument(
+        "--page-size",
+        type=positive_int,
+        default=DEFAULT_PAGE_SIZE,
+        help="Paged site: movies per page",
+    )
+    page_options.add_argument(
+        "--pages",
+        type=positive_int,
+        help="Paged site: split all movies into this many pages",
+    )
+    site_parser.add_argument(
+        "--output-dir",
+        default="movies",
+        help="Paged site: directory for the pages",
+    )
+    site_parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="Processes rendering movies in parallel",
+    )
+    site_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild and re-render every movie even if nothing changed",
+    )
+
+    cache_parser = commands.add_parser(
+        "cache-stats", help="Show OMDb API cache hit/miss counters"
+    )
+    cache_parser.add_argument(
+        "--clear", action="store_true", help="Empty the cache and reset counters"
+    )
+
+    return parser
+
+
+def run_command(args):
+    """Run a non-interactive command parsed from the command line"""
+    storage.init_db()
+
+    if args.command == "import":
+        import_movies_file(
+            args.file, on_duplicate=args.on_duplicate, chunk_size=args.chunk_size
+        )
+    elif args.command == "enrich":
+        enrich_titles_from_file(
+            args.file, max_concurrency=args.max_concurrency, add=args.add
+        )
+    elif args.command == "refresh":
+        refresh_stale_movies(
+            max_age_days=args.max_age_days,
+            max_concurrency=args.max_concurrency,
+            batch_size=args.batch_size,
+            restart=args.restart,
+        )
+    elif args.command == "posters":
+        download_posters(max_concurrency=args.max_concurrency)
+    elif args.command == "build-site":
+        if args.paged:
+            generate_paged_site(
+                page_size=args.page_size,
+                pages=args.pages,
+                output_dir=args.output_dir,
+                force=args.force,
+                workers=args.workers,
+            )
+        else:
+            generate_website(force=args.force, workers=args.workers)
+    elif args.command == "cache-stats":
+        if args.clear:
+            api_cache.clear()
+        print_cache_stats()
+
+
 def main():
     """Entry point of the application"""
-    welcome()
-    control_logic()
+    args = build_arg_parser().parse_args()
+    if args.write_behind:
+        storage.enable_write_behind(args.flush_size, args.flush_interval)
+
+    # Commit queued writes however the session ends, Ctrl-C and EOF
+    # included
+    try:
+        if args.command:
+            run_command(args)
+        else:
+            welcome()
+            control_logic()
+    finally:
+        failed = save_pending_writes()
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
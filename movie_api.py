@@ -3,9 +3,17 @@ Movie API integration with OMDb API
 """
 
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from dotenv import load_dotenv
+import api_client
+import rate_limiter
+from rate_limiter import INTERACTIVE, BATCH
+from single_flight import SingleFlight
+import title_resolver
 from storage import movie_storage_sql as storage
+from storage import api_cache
 from colorama import Fore, Style
 
 
@@ -13,46 +21,239 @@ from colorama import Fore, Style
 load_dotenv(dotenv_path='config/.env')
 API_KEY = os.getenv('OMDB_API_KEY')
 
-REQUEST_URL = "http://www.omdbapi.com/"
+# Point OMDB_BASE_URL at fake_omdb_server.py to work offline
+REQUEST_URL = os.getenv("OMDB_BASE_URL", "http://www.omdbapi.com/")
 
 
-def get_movie_from_api(search_title):
+def configure(base_url=None, api_key=None):
+    """Change the OMDb endpoint and/or API key used by all lookups"""
+    global REQUEST_URL, API_KEY
+    if base_url is not None:
+        REQUEST_URL = base_url
+    if api_key is not None:
+        API_KEY = api_key
+
+
+# Coalesces concurrent lookups of the same title into one request
+in_flight = SingleFlight()
+
+
+class MovieNotFoundError(LookupError):
+    """Raised when OMDb has no movie for the searched title"""
+
+
+def fetch_movie(search_title, use_cache=True, priority=INTERACTIVE,
+                year=None):
     """
-    Requests movie details from the OMDb API based on movie title.
+    Look up a movie on OMDb without printing anything.
+
+    Answers are served from the persistent API cache while fresh;
+    "not found" answers are cached as well (with a shorter TTL).
+    Concurrent lookups of the same (normalised) title share a single
+    HTTP request.
 
     Parameters:
         search_title (str): Movie title to search for
+        use_cache (bool): False always asks OMDb (the answer is still
+            stored in the cache)
+        priority (int): rate_limiter.INTERACTIVE or BATCH; decides who
+            gets the next request slot when the quota is tight
+        year (int): Only accept the movie released in this year (OMDb's
+            y= parameter); cached separately from the bare title
 
     Returns:
-        tuple: (Title, Year, imdbRating, Poster) or None if not found
+        tuple: (Title, Year, imdbRating, Poster)
+
+    Raises:
+        MovieNotFoundError: If OMDb (or the cache) has no such movie
+        requests.exceptions.RequestException: On HTTP or network errors,
+            or rate_limiter.RateLimitExceeded when the quota is used up
+        ValueError: If the response cannot be parsed
     """
+    cache_title = _cache_title(search_title, year)
+    if use_cache:
+        hit, cached = api_cache.get(cache_title)
+        if hit:
+            if cached is None:
+                raise MovieNotFoundError("Movie not found! (cached)")
+            return cached
+
+    return in_flight.do(
+        api_cache.normalize_key(cache_title),
+        lambda: _request_movie(search_title, priority, year),
+    )
+
+
+def _cache_title(search_title, year):
+    """Cache entry of a lookup, "Title (year)" when limited to a year"""
+    return search_title if year is None else f"{search_title} ({year})"
+
+
+def _get(params, priority, timeout=None):
+    """GET the OMDb endpoint, taking a rate-limit token for every attempt"""
+    return api_client.get(
+        REQUEST_URL, params=params, timeout=timeout,
+        before_send=lambda: rate_limiter.scheduler.acquire(priority),
+    )
+
+
+def _request_movie(search_title, priority, year=None):
+    """Ask OMDb for a title and cache the answer, see fetch_movie"""
     parameter = {"t": search_title, "apikey": API_KEY}
+    if year is not None:
+        parameter["y"] = year
+    cache_title = _cache_title(search_title, year)
+    res = _get(parameter, priority)
+    res.raise_for_status()
+    data = res.json()
 
-    try:
-        res = requests.get(REQUEST_URL, params=parameter)
+    if data.get("Response") != "True":
+        if data.get("Error") == "Movie not found!":
+            api_cache.put(cache_title, None)
+        raise MovieNotFoundError(data.get("Error"))
+
+    # Extract data
+    title = data.get("Title")
+    year = _parse_year(data.get("Year"))
+    rating = (
+        float(data.get("imdbRating", 0.0))
+        if data.get("imdbRating") not in ["N/A", None]
+        else 0.0
+    )
+    poster_url = data.get("Poster", "")
+
+    result = title, year, rating, poster_url
+    api_cache.put(cache_title, result)
+    api_cache.put_candidates([(title, year)])
+    return result
+
+
+def _parse_year(value):
+    """First 4-digit year in an OMDb Year field ("1999", "2008–2013")"""
+    match = re.search(r"\d{4}", value or "")
+    return int(match.group()) if match else 0
+
+
+def search_candidates_from_api(query, priority=INTERACTIVE):
+    """
+    Ask the OMDb ?s= search endpoint for titles similar to a query.
+
+    The candidates are stored in the API cache for local fuzzy matching.
+
+    Returns:
+        list: (title, year) pairs, empty if OMDb found nothing
+    """
+    def request():
+        res = _get({"s": query, "apikey": API_KEY}, priority)
         res.raise_for_status()
         data = res.json()
+        if data.get("Response") != "True":
+            return []
+        candidates = [
+            (item.get("Title"), _parse_year(item.get("Year")))
+            for item in data.get("Search", [])
+        ]
+        api_cache.put_candidates(candidates)
+        return candidates
 
-        if data.get("Response") == "True":
-            # Extract data
-            title = data.get("Title")
-            year = int(data.get("Year", 0))
-            rating = (
-                float(data.get("imdbRating", 0.0))
-                if data.get("imdbRating") not in ["N/A", None]
-                else 0.0
-            )
-            poster_url = data.get("Poster", "")
+    return in_flight.do(("search", api_cache.normalize_key(query)), request)
 
-            return title, year, rating, poster_url
-        else:
+
+def resolve_movie(search_title, priority=INTERACTIVE):
+    """
+    Look up a movie, tolerating typos in the title.
+
+    Tries, in order: a cached answer for the exact text, a locally
+    cached candidate with exactly that title, an exact OMDb lookup, the
+    closest locally cached candidate once an OMDb search confirms it,
+    and finally the best match among OMDb search results (searching the
+    whole title, then its longest word). Typos are only corrected once
+    the exact title is known not to exist, so "Toy Story 2" never turns
+    into "Toy Story 3".
+
+    Returns:
+        tuple: (Title, Year, imdbRating, Poster)
+
+    Raises:
+        MovieNotFoundError: If nothing close enough exists
+        requests.exceptions.RequestException: On HTTP or network errors
+    """
+    hit, cached = api_cache.get(search_title)
+    if hit and cached is not None:
+        return cached
+
+    local = title_resolver.resolve_locally(search_title, exact=True)
+    if local is not None:
+        return fetch_movie(local[0], priority=priority)
+
+    title, _ = title_resolver.split_year(search_title)
+    if not hit:
+        try:
+            return fetch_movie(title, priority=priority)
+        except MovieNotFoundError:
+            pass
+
+    # The exact title does not exist: now correct typos. A cached
+    # candidate is only taken if OMDb still lists it under that title.
+    local = title_resolver.resolve_locally(search_title)
+    if local is not None:
+        local_key = api_cache.normalize_key(local[0])
+        confirmed = any(
+            api_cache.normalize_key(name) == local_key and year == local[1]
+            for name, year in search_candidates_from_api(local[0], priority)
+        )
+        if confirmed:
+            return fetch_movie(local[0], priority=priority)
+
+    queries = [title]
+    longest_word = max(re.findall(r"\w+", title), key=len, default="")
+    if len(longest_word) >= 3 and longest_word != title:
+        queries.append(longest_word)
+    for query in queries:
+        candidates = [
+            (api_cache.normalize_key(name), year, name)
+            for name, year in search_candidates_from_api(query, priority)
+        ]
+        ranked = title_resolver.rank_candidates(search_title, candidates, limit=1)
+        if ranked:
+            return fetch_movie(ranked[0][2], priority=priority)
+
+    raise MovieNotFoundError("Movie not found!")
+
+
+def get_movie_from_api(search_title, fuzzy=False):
+    """
+    Requests movie details from the OMDb API based on movie title.
+
+    Parameters:
+        search_title (str): Movie title to search for
+        fuzzy (bool): Resolve typos through resolve_movie
+
+    Returns:
+        tuple: (Title, Year, imdbRating, Poster) or None if not found
+    """
+    try:
+        if not fuzzy:
+            return fetch_movie(search_title)
+
+        result = resolve_movie(search_title)
+        if api_cache.normalize_key(result[0]) != api_cache.normalize_key(
+            title_resolver.split_year(search_title)[0]
+        ):
             print(
-                f"{Fore.RED}{Style.BRIGHT}"
-                f"Movie '{search_title}' not found: "
-                f"{data.get('Error')}{Style.RESET_ALL}"
+                f"{Fore.YELLOW}{Style.BRIGHT}"
+                f"Closest match for '{search_title}': {result[0]}"
+                f"{Style.RESET_ALL}"
             )
-            return None
+        return result
 
+    except MovieNotFoundError as e:
+        print(
+            f"{Fore.RED}{Style.BRIGHT}"
+            f"Movie '{search_title}' not found: "
+            f"{e}{Style.RESET_ALL}"
+        )
+        return None
     except requests.exceptions.HTTPError as e:
         print(
             f"{Fore.RED}{Style.BRIGHT}"
@@ -72,6 +273,100 @@ def get_movie_from_api(search_title):
         return None
 
 
+def _fetch_for_batch(search_title, use_cache=True, year=None):
+    try:
+        return {"search_title": search_title,
+                "result": fetch_movie(search_title, use_cache=use_cache,
+                                      priority=BATCH, year=year),
+                "error": None}
+    except (MovieNotFoundError, requests.exceptions.RequestException,
+            ValueError) as e:
+        return {"search_title": search_title, "result": None, "error": str(e)}
+
+
+def get_movies_from_api_batch(titles, max_concurrency=8, use_cache=True,
+                              years=None):
+    """
+    Look up many titles concurrently.
+
+    Parameters:
+        titles (iterable): Titles to search for
+        max_concurrency (int): Maximum number of requests in flight
+        use_cache (bool): False bypasses cached answers, see fetch_movie
+        years (iterable): Release year per title (None for any year),
+            passed to OMDb as y=
+
+    Returns:
+        list: One dict per title, in input order, with "search_title",
+            "result" ((Title, Year, imdbRating, Poster) or None) and
+            "error" (None on success)
+    """
+    titles = list(titles)
+    years = [None] * len(titles) if years is None else list(years)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(
+            lambda title, year: _fetch_for_batch(title, use_cache, year),
+            titles, years,
+        ))
+
+
+def enrich_titles_from_file(file_path, max_concurrency=8, add=False):
+    """
+    Look up every title listed in a file (one per line) and print results.
+
+    Parameters:
+        file_path (str): Text file with one title per line
+        max_concurrency (int): Maximum number of requests in flight
+        add (bool): Also add the movies that were found to the database
+
+    Returns:
+        list: Per-title results from get_movies_from_api_batch
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as fileobject:
+            titles = [line.strip() for line in fileobject if line.strip()]
+    except OSError as e:
+        print(f"{Fore.RED}{Style.BRIGHT}Cannot read titles: {e}{Style.RESET_ALL}")
+        return []
+
+    print(
+        f"{Fore.YELLOW}{Style.BRIGHT}Looking up {len(titles)} titles "
+        f"({max_concurrency} at a time)...{Style.RESET_ALL}"
+    )
+    print_quota()
+    in_flight.reset_stats()
+    results = get_movies_from_api_batch(titles, max_concurrency=max_concurrency)
+    dedup = in_flight.stats()
+
+    found = []
+    for item in results:
+        if item["result"]:
+            title, year, rating, _ = item["result"]
+            found.append(item["result"])
+            print(f"{Fore.GREEN}{item['search_title']} -> "
+                  f"{title} ({year}), {rating}{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.RED}{item['search_title']}: "
+                  f"{item['error']}{Style.RESET_ALL}")
+
+    print(
+        f"{Fore.CYAN}{Style.BRIGHT}{len(found)} of {len(results)} "
+        f"titles found{Style.RESET_ALL}"
+    )
+    print(
+        f"{Fore.CYAN}{dedup['executed']} API requests sent, "
+        f"{dedup['shared']} duplicate lookups shared an in-flight request"
+        f"{Style.RESET_ALL}"
+    )
+    if add and found:
+        outcomes = storage.add_movies_bulk(found, fetched=True)
+        added = sum(1 for outcome in outcomes if outcome["status"] == "added")
+        print(f"{Fore.GREEN}{Style.BRIGHT}{added} movies added "
+              f"to the database{Style.RESET_ALL}")
+
+    return results
+
+
 def search_movie_api():
     """
     Interactive function to search for movie via API with comprehensive
@@ -103,9 +398,12 @@ def search_movie_api():
         f"{Fore.YELLOW}{Style.BRIGHT}Searching for '{search_title}' "
         f"in OMDb database...{Style.RESET_ALL}"
     )
+    quota = rate_limiter.scheduler.status()
+    if quota["wait_seconds"] >= 1 or quota["daily_remaining"] <= 10:
+        print_quota(quota)
 
-    # Attempt API call
-    result = get_movie_from_api(search_title)
+    # Attempt API call, correcting typos where possible
+    result = get_movie_from_api(search_title, fuzzy=True)
 
     # Handle different result scenarios
     if result is None:
@@ -204,7 +502,7 @@ def search_movie_api():
             )
 
             if confirm in ["y", "yes"]:
-                storage.add_movie(title, year, rating, poster_url)
+                storage.add_movie(title, year, rating, poster_url, fetched=True)
                 return result
             elif confirm in ["n", "no"]:
                 print(
@@ -230,8 +528,37 @@ def test_api_connection():
     """
     try:
         test_params = {"t": "test", "apikey": API_KEY}
-        response = requests.get(REQUEST_URL, params=test_params, timeout=5)
+        response = _get(test_params, INTERACTIVE, timeout=5)
         return response.status_code == 200
-    except requests.exceptions.HTTPError as e:
+    except requests.exceptions.RequestException as e:
         print(f"Error accessing the API request: {e}")
         return False
+
+
+def print_quota(quota=None):
+    """Print how many OMDb requests are left and the expected wait"""
+    quota = quota or rate_limiter.scheduler.status()
+    print(
+        f"{Fore.CYAN}OMDb quota: {quota['daily_remaining']} requests left today "
+        f"(resets in {quota['resets_in'] / 3600:.1f}h), "
+        f"expected wait {quota['wait_seconds']:.1f}s, "
+        f"{quota['queued']['batch']} batch requests queued{Style.RESET_ALL}"
+    )
+
+
+def print_cache_stats():
+    """Print the API cache size and hit/miss counters (debug command)"""
+    cache_stats = api_cache.stats()
+    lookups = cache_stats["hits"] + cache_stats["negative_hits"] + cache_stats["misses"]
+    hit_rate = (
+        (cache_stats["hits"] + cache_stats["negative_hits"]) / lookups * 100
+        if lookups
+        else 0.0
+    )
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}OMDb API cache{Style.RESET_ALL}")
+    for name, value in cache_stats.items():
+        print(f"{Fore.BLUE}{name.replace('_', ' ').title()}: "
+              f"{Fore.WHITE}{value}{Style.RESET_ALL}")
+    print(f"{Fore.BLUE}Hit Rate: {Fore.WHITE}{hit_rate:.1f}%{Style.RESET_ALL}")
+    print_quota()
@@ -0,0 +1,215 @@
+"""
+In-memory movie catalog with case-insensitive title lookups
+"""
+
+import sys
+from array import array
+from collections.abc import MutableMapping
+from rating_stats import RatingStats
+
+# Fields every movie has, in the order MovieCatalog stores them
+FIELDS = ("year", "rating", "poster_url")
+
+
+def normalize_title(title):
+    """Key used for case-insensitive title comparisons"""
+    return title.casefold()
+
+
+class MovieView:
+    """
+    Live view of one movie's details inside a MovieCatalog.
+
+    Supports details["rating"] style reads and writes so callers written
+    for the old dict of dicts keep working; writes go straight to the
+    catalog's arrays. A view is only valid until its movie is deleted.
+    """
+
+    __slots__ = ("_catalog", "_slot")
+
+    def __init__(self, catalog, slot):
+        self._catalog = catalog
+        self._slot = slot
+
+    def __getitem__(self, key):
+        return self._catalog._get_field(self._slot, key)
+
+    def __setitem__(self, key, value):
+        self._catalog._set_field(self._slot, key, value)
+
+    def get(self, key, default=None):
+        """dict.get() equivalent"""
+        return self[key] if key in FIELDS else default
+
+    def keys(self):
+        """dict.keys() equivalent"""
+        return FIELDS
+
+    def __eq__(self, other):
+        try:
+            return all(self[key] == other.get(key) for key in FIELDS)
+        except AttributeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return repr({key: self[key] for key in FIELDS})
+
+
+class MovieCatalog(MutableMapping):
+    """
+    Compact mapping of {title: details} with case-insensitive lookups.
+
+    Instead of one dict per movie, titles are interned into a list and
+    details are kept in parallel columns: array('H') years, array('f')
+    ratings and a list of poster URLs. A single dict maps casefolded
+    titles to their slot, which both find() and item access use, so
+    lookups stay O(1). Deleting moves the last movie into the freed slot.
+
+    rating_stats is kept in step with every add, update and delete.
+    """
+
+    def __init__(self, movies=None):
+        self.rating_stats = RatingStats()
+        self._titles = []
+        self._years = array("H")
+        self._ratings = array("f")
+        self._posters = []
+        self._slots = {}
+        if movies:
+            self.update(movies)
+
+    def _slot_of(self, title):
+        slot = self._slots.get(normalize_title(title))
+        if slot is None or self._titles[slot] != title:
+            raise KeyError(title)
+        return slot
+
+    def _get_field(self, slot, key):
+        if key == "year":
+            return self._years[slot]
+        if key == "rating":
+            # float32 storage; ratings never carry more than 2 decimals
+            return round(self._ratings[slot], 2)
+        if key == "poster_url":
+            return self._posters[slot]
+        raise KeyError(key)
+
+    def _set_field(self, slot, key, value):
+        if key == "year":
+            self._years[slot] = value
+        elif key == "rating":
+            old_rating = self._get_field(slot, "rating")
+            self._ratings[slot] = value
+            self.rating_stats.update(old_rating, self._get_field(slot, "rating"),
+                                     self._titles[slot])
+        elif key == "poster_url":
+            self._posters[slot] = value or ""
+        else:
+            raise KeyError(key)
+
+    def __getitem__(self, title):
+        return MovieView(self, self._slot_of(title))
+
+    def __setitem__(self, title, details):
+        key = normalize_title(title)
+        # Convert before touching any column: a year or rating the arrays
+        # cannot hold raises here and leaves every column as it was
+        year = array("H", [details["year"]])[0]
+        rating = array("f", [details["rating"]])[0]
+        poster_url = details.get("poster_url") or ""
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._titles)
+            self._titles.append(sys.intern(title))
+            self._years.append(year)
+            self._ratings.append(rating)
+            self._posters.append(poster_url)
+            self._slots[key] = slot
+            self.rating_stats.add(self._get_field(slot, "rating"), self._titles[slot])
+            return
+
+        # Same title (in any case) replaces the stored movie
+        self.rating_stats.remove(self._get_field(slot, "rating"), self._titles[slot])
+        self._titles[slot] = sys.intern(title)
+        self._years[slot] = year
+        self._ratings[slot] = rating
+        self._posters[slot] = poster_url
+        self.rating_stats.add(self._get_field(slot, "rating"), self._titles[slot])
+
+    def __delitem__(self, title):
+        slot = self._slot_of(title)
+        self.rating_stats.remove(self._get_field(slot, "rating"), self._titles[slot])
+        last = len(self._titles) - 1
+        if slot != last:
+            self._titles[slot] = self._titles[last]
+            self._years[slot] = self._years[last]
+            self._ratings[slot] = self._ratings[last]
+            self._posters[slot] = self._posters[last]
+            self._slots[normalize_title(self._titles[slot])] = slot
+
+        del self._slots[normalize_title(title)]
+        self._titles.pop()
+        self._years.pop()
+        self._ratings.pop()
+        self._posters.pop()
+
+    def __contains__(self, title):
+        slot = self._slots.get(normalize_title(title))
+        return slot is not None and self._titles[slot] == title
+
+    def __iter__(self):
+        return iter(self._titles)
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __repr__(self):
+        return f"MovieCatalog({dict(self.items())!r})"
+
+    def find(self, title):
+        """
+        Return the stored spelling of a title, ignoring case.
+
+        Parameters:
+            title (str): Title as typed by the user
+
+        Returns:
+            str: The canonical title, or None if it is not in the catalog
+        """
+        slot = self._slots.get(normalize_title(title))
+        return None if slot is None else self._titles[slot]
+
+
+if __name__ == "__main__":
+    # Memory benchmark: python movie_catalog.py [number_of_movies]
+    import tracemalloc
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    def sample_rows():
+        for i in range(count):
+            yield f"Movie Title {i}", 1900 + i % 125, (i % 100) / 10, ""
+
+    def measure(build):
+        tracemalloc.start()
+        collection = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del collection
+        return size
+
+    dict_bytes = measure(lambda: {
+        title: {"year": year, "rating": rating, "poster_url": poster_url}
+        for title, year, rating, poster_url in sample_rows()
+    })
+    catalog_bytes = measure(lambda: MovieCatalog(
+        (title, {"year": year, "rating": rating, "poster_url": poster_url})
+        for title, year, rating, poster_url in sample_rows()
+    ))
+
+    print(f"{count} movies")
+    print(f"dict of dicts: {dict_bytes / 2**20:8.1f} MiB "
+          f"({dict_bytes / count:.0f} B/movie)")
+    print(f"MovieCatalog:  {catalog_bytes / 2**20:8.1f} MiB "
+          f"({catalog_bytes / count:.0f} B/movie)")
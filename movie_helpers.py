@@ -5,6 +5,7 @@ Movie helper functions
 import sys
 from colorama import Fore, Style
 from movie_validators import get_valid_title, user_input_validity
+from storage import movie_storage_sql as storage
 
 
 def continue_or_quit():
@@ -16,6 +17,7 @@ def continue_or_quit():
         )
 
         if user_choice in ["quit", "q"]:
+            save_pending_writes()
             print(
                 Fore.YELLOW
                 + Style.BRIGHT
@@ -34,19 +36,40 @@ def continue_or_quit():
             )
 
 
+def show_next_page():
+    """Ask whether to show the next page of a paged listing"""
+    while True:
+        user_choice = (
+            input("\nPress 'enter' for the next page or 's' to stop: ")
+            .strip().lower()
+        )
+
+        if user_choice == "":
+            return True
+        if user_choice in ["stop", "s"]:
+            return False
+
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "Invalid input. Press 'enter' or type 's'."
+            + Style.RESET_ALL
+        )
+
+
 def find_movie_for_update(movies_dict):
     """Find movie for updating"""
     user_input = get_valid_title()
 
-    for title in movies_dict.keys():
-        if title.lower() == user_input.lower():
-            print(
-                Fore.GREEN
-                + Style.BRIGHT
-                + f"\n{title} found in database"
-                + Style.RESET_ALL
-            )
-            return title
+    title = movies_dict.find(user_input)
+    if title is not None:
+        print(
+            Fore.GREEN
+            + Style.BRIGHT
+            + f"\n{title} found in database"
+            + Style.RESET_ALL
+        )
+        return title
 
     print(
         Fore.RED
@@ -126,10 +149,25 @@ def get_user_confirmation_for_update(movie_title):
             return None
 
 
+def save_pending_writes():
+    """Commit queued writes on exit and list any that were lost"""
+    failed = storage.close_write_behind()
+    if failed:
+        print(
+            f"{Fore.RED}{Style.BRIGHT}\n{len(failed)} changes could not be "
+            f"saved:{Style.RESET_ALL}"
+        )
+        for write in failed:
+            print(f"{Fore.RED}{write['op']} '{write['title']}': "
+                  f"{write['error']}{Style.RESET_ALL}")
+    return failed
+
+
 def exit_app():
     """Exit the application"""
+    failed = save_pending_writes()
     print(Fore.YELLOW + Style.BRIGHT + "\nBye!" + Style.RESET_ALL)
-    sys.exit()
+    sys.exit(1 if failed else 0)
 
 
 def welcome():
@@ -153,9 +191,16 @@ def display_menu():
     )
 
 
+def show_write_messages():
+    """Print what background write-behind flushes reported meanwhile"""
+    for message in storage.take_write_messages():
+        print(Fore.YELLOW + message + Style.RESET_ALL)
+
+
 def get_user_choice():
     """Get valid user menu choice"""
     while True:
+        show_write_messages()
         display_menu()
         choice = input("\nEnter choice (0-10): ").strip()
 
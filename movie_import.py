@@ -0,0 +1,104 @@
+"""
+Bulk movie import from CSV and JSONL files
+"""
+
+import csv
+import json
+import os
+from colorama import Fore, Style
+from storage import movie_storage_sql as storage
+
+
+def read_movies_csv(file_path):
+    """
+    Stream movie rows from a CSV file with a header line.
+
+    Parameters:
+        file_path (str): CSV file with title, year, rating and an
+            optional poster_url column
+
+    Yields:
+        dict: One movie row per line
+    """
+    with open(file_path, "r", encoding="utf-8", newline="") as fileobject:
+        for row in csv.DictReader(fileobject):
+            yield row
+
+
+def read_movies_jsonl(file_path):
+    """
+    Stream movie rows from a JSON Lines file.
+
+    Parameters:
+        file_path (str): File with one JSON object per line
+
+    Yields:
+        dict: One movie row per non-empty line, or a ValueError naming
+            the line for JSON that cannot be parsed, which
+            storage.add_movies_bulk reports as that row's error
+    """
+    with open(file_path, "r", encoding="utf-8") as fileobject:
+        for line_number, line in enumerate(fileobject, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = ValueError(f"line {line_number}: invalid JSON ({e.msg})")
+            yield row
+
+
+def read_movies_file(file_path):
+    """Pick the reader matching the file extension"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        return read_movies_csv(file_path)
+    if extension in (".jsonl", ".ndjson"):
+        return read_movies_jsonl(file_path)
+    raise ValueError(f"Unsupported import format '{extension}' (use .csv or .jsonl)")
+
+
+def import_movies_file(file_path, on_duplicate="skip", chunk_size=1000):
+    """
+    Import a CSV/JSONL file into the database and print a summary.
+
+    Parameters:
+        file_path (str): Path to the .csv or .jsonl file
+        on_duplicate (str): "skip" or "upsert" for titles already stored
+        chunk_size (int): Number of rows written per transaction
+
+    Returns:
+        list: Per-row outcomes from storage.add_movies_bulk
+    """
+    try:
+        rows = read_movies_file(file_path)
+        outcomes = storage.add_movies_bulk(
+            rows, on_duplicate=on_duplicate, chunk_size=chunk_size
+        )
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}{Style.BRIGHT}Import failed: {e}{Style.RESET_ALL}")
+        return []
+
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+
+    print(
+        f"{Fore.GREEN}{Style.BRIGHT}"
+        f"Imported {len(outcomes)} rows: "
+        f"{counts.get('added', 0)} added, "
+        f"{counts.get('updated', 0)} updated, "
+        f"{counts.get('skipped', 0)} skipped, "
+        f"{counts.get('error', 0)} errors"
+        f"{Style.RESET_ALL}"
+    )
+    for line_number, outcome in enumerate(outcomes, start=1):
+        if outcome["status"] == "error":
+            print(
+                f"{Fore.RED}Row {line_number} "
+                f"({outcome['title'] or 'untitled'}): "
+                f"{outcome['error']}{Style.RESET_ALL}"
+            )
+
+    return outcomes
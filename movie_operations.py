@@ -9,21 +9,67 @@ from titlecase import titlecase
 from movie_validators import get_valid_title, get_valid_year_input, get_valid_ratings
 from movie_helpers import (
     continue_or_quit,
+    show_next_page,
     find_movie_for_update,
     get_user_confirmation,
     get_user_confirmation_for_update,
 )
 from movie_api import search_movie_api
+from movie_catalog import MovieCatalog
+
+# Number of movies shown per page by list_movies
+LIST_PAGE_SIZE = 20
+
+# Maximum number of results shown by search_movie
+SEARCH_RESULT_LIMIT = 50
 
 
 def initialize_app_data():
     """Get movies data from database"""
-    return storage.list_movies()
+    storage.init_db()
+    # Fed row by row, so no intermediate dict of all movies is built
+    catalog = MovieCatalog()
+    for movie in storage.iter_movies():
+        try:
+            catalog[movie["title"]] = movie
+        except (OverflowError, TypeError, ValueError) as e:
+            print(
+                f"{Fore.RED}Skipping '{movie['title']}': "
+                f"invalid year or rating ({e}){Style.RESET_ALL}"
+            )
+    return catalog
 
 
-def list_movies(movies_dict):
-    """List all movies"""
-    if not movies_dict:
+def print_movies_page(page, page_number, total_pages):
+    """Print one page of movies as a table"""
+    title_width = max(len(movie["title"]) for movie in page)
+    print(
+        f"{Fore.MAGENTA}{Style.BRIGHT}"
+        f"\nPage {page_number}/{total_pages}\n"
+        f"{'TITLE'.ljust(title_width)} | {'RATING'.center(6)} | YEAR"
+        f"{Style.RESET_ALL}"
+    )
+    print(
+        f"{Fore.WHITE}{Style.BRIGHT}"
+        f"{'-' * title_width} |{'-' * 8}|-----"
+        f"{Style.RESET_ALL}"
+    )
+
+    for movie in page:
+        rating, year = movie["rating"], movie["year"]
+        if isinstance(rating, (int, float)) and isinstance(year, int):
+            print(
+                f"{Fore.BLUE}{Style.BRIGHT}"
+                f"{titlecase(movie['title']).ljust(title_width)} |"
+                f"{Fore.GREEN}{Style.BRIGHT}{str(f'{rating:.1f}').center(6)}  |"
+                f"{Fore.GREEN}{Style.BRIGHT} {year}{Style.RESET_ALL}"
+            )
+
+
+def list_movies(movies_dict, page_size=LIST_PAGE_SIZE):
+    """List all movies, one page at a time, streamed from the database"""
+    total_movies = storage.count_movies()
+    if not total_movies:
         print(
             Fore.RED
             + Style.BRIGHT
@@ -36,34 +82,26 @@ def list_movies(movies_dict):
     print(
         Fore.YELLOW
         + Style.BRIGHT
-        + f"\n{len(movies_dict)} movies in total\n"
+        + f"\n{total_movies} movies in total"
         + Style.RESET_ALL
     )
 
-    title_width = max(len(title) for title in movies_dict.keys())
-    print(
-        f"{Fore.MAGENTA}{Style.BRIGHT}"
-        f"{'TITLE'.ljust(title_width)} | {'RATING'.center(6)} | YEAR"
-        f"{Style.RESET_ALL}"
-    )
-    print(
-        f"{Fore.WHITE}{Style.BRIGHT}"
-        f"{'-' * title_width} |{'-' * 8}|-----"
-        f"{Style.RESET_ALL}"
-    )
+    total_pages = -(-total_movies // page_size)
+    page = []
+    page_number = 0
+    for movie in storage.iter_movies(batch_size=page_size, order_by="title"):
+        page.append(movie)
+        if len(page) < page_size:
+            continue
+
+        page_number += 1
+        print_movies_page(page, page_number, total_pages)
+        page = []
+        if page_number < total_pages and not show_next_page():
+            break
 
-    for title, details in movies_dict.items():
-        rating, year = details["rating"], details["year"]
-        if (
-            isinstance(details, dict)
-            and isinstance(rating, (int, float))
-            and isinstance(year, int)
-        ):
-            print(
-                f"{Fore.BLUE}{Style.BRIGHT}{titlecase(title).ljust(title_width)} |"
-                f"{Fore.GREEN}{Style.BRIGHT}{str(f'{rating:.1f}').center(6)}  |"
-                f"{Fore.GREEN}{Style.BRIGHT} {year}{Style.RESET_ALL}"
-            )
+    if page:
+        print_movies_page(page, page_number + 1, total_pages)
 
     continue_or_quit()
 
@@ -107,7 +145,7 @@ def add_movie_via_api(movies_dict):
         title, year, rating, poster_url = api_result
 
         # Check if movie already exists
-        if title in movies_dict:
+        if movies_dict.find(title) is not None:
             print(
                 f"{Fore.RED}{Style.BRIGHT}\n{title} "
                 f"already exists in database"
@@ -117,7 +155,7 @@ def add_movie_via_api(movies_dict):
 
         # Add to local dict and database
         movies_dict[title] = {"rating": rating, "year": year, "poster_url": poster_url}
-        storage.add_movie(title, year, rating, poster_url)
+        storage.add_movie(title, year, rating, poster_url, fetched=True)
 
         print(
             f"{Fore.GREEN}{Style.BRIGHT}\n{title} "
@@ -133,7 +171,7 @@ def add_movie_manually(movies_dict):
     """Add movie with manual input"""
     title = get_valid_title()
 
-    if title in movies_dict:
+    if movies_dict.find(title) is not None:
         print(
             f"{Fore.RED}{Style.BRIGHT}\n{title} "
             f"already exists in database"
@@ -256,11 +294,7 @@ def delete_movie(movies_dict):
     """Delete a movie"""
     title = get_valid_title()
 
-    found_title = None
-    for t in movies_dict.keys():
-        if t.lower() == title.lower():
-            found_title = t
-            break
+    found_title = movies_dict.find(title)
 
     if found_title:
         print(
@@ -364,12 +398,8 @@ def random_movie(movies_dict):
 
 def search_movie(movies_dict):
     """Search for movies"""
-    search_term = input("\nEnter part of movie name: ").strip().lower()
-    matches = [
-        (title, details)
-        for title, details in movies_dict.items()
-        if search_term in title.lower()
-    ]
+    search_term = input("\nEnter part of movie name: ").strip()
+    matches = storage.search_movies(search_term, limit=SEARCH_RESULT_LIMIT)
 
     if not matches:
         print(
@@ -379,12 +409,12 @@ def search_movie(movies_dict):
             + Style.RESET_ALL
         )
     else:
-        for title, details in matches:
+        for movie in matches:
             print(
-                f"{Fore.BLUE}{Style.BRIGHT}{title}{Style.RESET_ALL}, "
+                f"{Fore.BLUE}{Style.BRIGHT}{movie['title']}{Style.RESET_ALL}, "
                 f"{Fore.GREEN}{Style.BRIGHT}"
-                f"Rating: {details['rating']:.1f}, "
-                f"Year: {details['year']}{Style.RESET_ALL}"
+                f"Rating: {movie['rating']:.1f}, "
+                f"Year: {movie['year']}{Style.RESET_ALL}"
             )
 
     continue_or_quit()
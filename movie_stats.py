@@ -4,13 +4,22 @@ Movie statistics and sorting functions
 
 from colorama import Fore, Style
 from movie_helpers import continue_or_quit
+from rating_stats import RatingStats
+from storage import movie_storage_sql as storage
+
+
+def get_rating_stats(movies_dict):
+    """Use the catalog's running statistics, or compute them for a dict"""
+    rating_stats = getattr(movies_dict, "rating_stats", None)
+    if rating_stats is None:
+        rating_stats = RatingStats.from_movies(movies_dict)
+    return rating_stats
 
 
 def calculate_average_and_median(movies_dict):
     """Calculate and display average and median ratings"""
-    ratings = [details["rating"] for details in movies_dict.values()]
-    total_movies = len(ratings)
-    average = sum(ratings) / total_movies
+    rating_stats = get_rating_stats(movies_dict)
+    average = rating_stats.average()
 
     print(
         f"\n{Fore.BLUE}{Style.BRIGHT}"
@@ -19,14 +28,7 @@ def calculate_average_and_median(movies_dict):
         f"{Style.RESET_ALL}"
     )
 
-    # Median calculation
-    sorted_ratings = sorted(ratings)
-    middle = total_movies // 2
-
-    if total_movies % 2 != 0:
-        median = sorted_ratings[middle]
-    else:
-        median = (sorted_ratings[middle] + sorted_ratings[middle - 1]) / 2
+    median = rating_stats.median()
 
     print(
         f"{Fore.BLUE}{Style.BRIGHT}"
@@ -38,22 +40,19 @@ def calculate_average_and_median(movies_dict):
 
 def best_and_worst_movies(movies_dict):
     """Display best and worst movies"""
-    ratings = [(title, details["rating"]) for title, details in movies_dict.items()]
-    max_rating = max(ratings, key=lambda x: x[1])[1]
-    min_rating = min(ratings, key=lambda x: x[1])[1]
-
-    best_movies = [movie for movie in ratings if movie[1] == max_rating]
-    worst_movies = [movie for movie in ratings if movie[1] == min_rating]
+    rating_stats = get_rating_stats(movies_dict)
+    max_rating, best_titles = rating_stats.best()
+    min_rating, worst_titles = rating_stats.worst()
 
     print(f"\n{Fore.BLUE}{Style.BRIGHT}"
           f"🎬 Best movie(s):"
           f"{Style.RESET_ALL}"
     )
-    for title, rating in best_movies:
+    for title in best_titles:
         print(
             f"{Fore.MAGENTA}{Style.BRIGHT}"
             f"-> {title} - {Fore.GREEN}{Style.BRIGHT}"
-            f"{rating:.1f}"
+            f"{max_rating:.1f}"
             f"{Style.RESET_ALL}"
         )
 
@@ -61,11 +60,11 @@ def best_and_worst_movies(movies_dict):
           f"🎬 Worst movie(s):"
           f"{Style.RESET_ALL}"
     )
-    for title, rating in worst_movies:
+    for title in worst_titles:
         print(
             f"{Fore.MAGENTA}{Style.BRIGHT}"
             f"-> {title} - {Fore.GREEN}{Style.BRIGHT}"
-            f"{rating:.1f}"
+            f"{min_rating:.1f}"
             f"{Style.RESET_ALL}"
         )
 
@@ -99,7 +98,8 @@ def movies_sorted_by_rating(movies_dict):
         continue_or_quit()
         return
 
-    sorted_movies = sorted(movies_dict.items(), key=lambda x: (-x[1]["rating"], x[0]))
+    # Streamed from the database in rating index order
+    sorted_movies = storage.iter_movies(order_by="rating", descending=True)
 
     print(
         f"\n{Fore.YELLOW}{Style.BRIGHT}"
@@ -107,12 +107,12 @@ def movies_sorted_by_rating(movies_dict):
         f"{Style.RESET_ALL}"
     )
 
-    for title, details in sorted_movies:
+    for movie in sorted_movies:
         print(
-            f"{Fore.BLUE}{title}{Style.RESET_ALL}, "
+            f"{Fore.BLUE}{movie['title']}{Style.RESET_ALL}, "
             f"{Fore.MAGENTA}{Style.BRIGHT}Rating:"
-            f" {details['rating']:.1f},{Style.RESET_ALL} "
-            f"{Fore.GREEN}Year: {details['year']}"
+            f" {movie['rating']:.1f},{Style.RESET_ALL} "
+            f"{Fore.GREEN}Year: {movie['year']}"
             f"{Style.RESET_ALL}"
         )
 
@@ -131,7 +131,8 @@ def movies_sorted_by_year(movies_dict):
         continue_or_quit()
         return
 
-    sorted_movies = sorted(movies_dict.items(), key=lambda x: (-x[1]["year"], x[0]))
+    # Streamed from the database in year index order
+    sorted_movies = storage.iter_movies(order_by="year", descending=True)
 
     print(
         f"\n{Fore.YELLOW}{Style.BRIGHT}"
@@ -139,11 +140,11 @@ def movies_sorted_by_year(movies_dict):
         f"{Style.RESET_ALL}"
     )
 
-    for title, details in sorted_movies:
+    for movie in sorted_movies:
         print(
-            f"{Fore.BLUE}{title}{Style.RESET_ALL}, "
-            f"{Fore.GREEN}Rating: {details['rating']:.1f},{Style.RESET_ALL} "
-            f"{Fore.MAGENTA}{Style.BRIGHT}Year: {details['year']}"
+            f"{Fore.BLUE}{movie['title']}{Style.RESET_ALL}, "
+            f"{Fore.GREEN}Rating: {movie['rating']:.1f},{Style.RESET_ALL} "
+            f"{Fore.MAGENTA}{Style.BRIGHT}Year: {movie['year']}"
             f"{Style.RESET_ALL}"
         )
 
@@ -0,0 +1,146 @@
+"""
+Local poster download and thumbnail cache
+
+Downloads OMDb poster images concurrently into static/posters/, names
+each file after the SHA-256 of its content (so a poster shared by
+several movies is stored once), renders a fixed-size thumbnail next to
+it and records the thumbnail path and size in the movies table. The site
+generator then serves these local thumbnails instead of hot-linking.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+from PIL import Image, ImageOps
+from sqlalchemy import text
+import requests
+from api_client import HttpClient
+from storage import movie_storage_sql as storage
+from storage.database import project_root
+
+POSTER_DIR = os.path.join("static", "posters")
+THUMBNAIL_DIR = os.path.join(POSTER_DIR, "thumbs")
+# Matches the .movie-poster box in static/style.css
+THUMBNAIL_SIZE = (150, 193)
+
+# Separate pool and circuit breaker from the OMDb API client
+poster_client = HttpClient()
+
+
+def find_movies_without_thumbnail(after_id, limit):
+    """Next batch of movies with a remote poster and no local thumbnail"""
+    with storage.engine.connect() as conn:
+        return conn.execute(
+            text(
+                "SELECT id, poster_url FROM movies "
+                "WHERE id > :after_id AND poster_path IS NULL "
+                "AND (poster_url LIKE 'http://%' OR poster_url LIKE 'https://%') "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"after_id": after_id, "limit": limit},
+        ).fetchall()
+
+
+def store_poster(content, size=THUMBNAIL_SIZE):
+    """
+    Save a downloaded poster and its thumbnail under their content hash.
+
+    Files that already exist are not written again.
+
+    Parameters:
+        content (bytes): Image file as downloaded
+        size (tuple): (width, height) of the thumbnail
+
+    Returns:
+        str: Thumbnail path relative to the project root (for the site)
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    width, height = size
+    thumbnail_path = os.path.join(THUMBNAIL_DIR, f"{digest}-{width}x{height}.jpg")
+    original_path = os.path.join(POSTER_DIR, digest)
+
+    # Temp names are per thread: two movies can share one poster and be
+    # downloaded at the same time
+    temp_suffix = f".{threading.get_ident()}.tmp"
+
+    target = os.path.join(project_root, original_path)
+    if not os.path.exists(target):
+        with open(target + temp_suffix, "wb") as fileobject:
+            fileobject.write(content)
+        os.replace(target + temp_suffix, target)
+
+    target = os.path.join(project_root, thumbnail_path)
+    if not os.path.exists(target):
+        with Image.open(io.BytesIO(content)) as image:
+            thumbnail = ImageOps.fit(image.convert("RGB"), size, Image.LANCZOS)
+            thumbnail.save(target + temp_suffix, "JPEG", quality=85, optimize=True)
+        os.replace(target + temp_suffix, target)
+
+    return thumbnail_path.replace(os.sep, "/")
+
+
+def _download(row):
+    """Fetch and store one poster; returns (id, thumbnail path or error)"""
+    try:
+        response = poster_client.get(row.poster_url)
+        response.raise_for_status()
+        return row.id, store_poster(response.content), None
+    except (requests.exceptions.RequestException, OSError,
+            Image.DecompressionBombError) as e:
+        return row.id, None, str(e)
+
+
+def download_posters(max_concurrency=8, batch_size=100):
+    """
+    Download and thumbnail every poster that has no local copy yet.
+
+    Parameters:
+        max_concurrency (int): Downloads in flight
+        batch_size (int): Movies processed and committed per batch
+
+    Returns:
+        dict: Counts of "downloaded" and "failed" posters
+    """
+    storage.flush_writes()
+    os.makedirs(os.path.join(project_root, THUMBNAIL_DIR), exist_ok=True)
+    width, height = THUMBNAIL_SIZE
+    downloaded = failed = 0
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while True:
+            rows = find_movies_without_thumbnail(last_id, batch_size)
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            updates = []
+            for movie_id, thumbnail_path, error in executor.map(_download, rows):
+                if error:
+                    failed += 1
+                    print(f"{Fore.RED}Poster for movie {movie_id} "
+                          f"failed: {error}{Style.RESET_ALL}")
+                    continue
+                downloaded += 1
+                updates.append({"id": movie_id, "poster_path": thumbnail_path,
+                                "width": width, "height": height})
+
+            if updates:
+                with storage.engine.begin() as conn:
+                    conn.execute(
+                        text(
+                            "UPDATE movies SET poster_path = :poster_path, "
+                            "poster_width = :width, poster_height = :height "
+                            "WHERE id = :id"
+                        ),
+                        updates,
+                    )
+
+    print(
+        f"{Fore.GREEN}{Style.BRIGHT}{downloaded} posters cached locally, "
+        f"{failed} failed{Style.RESET_ALL}"
+    )
+    return {"downloaded": downloaded, "failed": failed}
@@ -0,0 +1,171 @@
+"""
+Token-bucket rate limiting with priorities for OMDb calls
+
+Every API request first takes a token from a bucket that refills at
+RATE_PER_SECOND (up to BURST tokens) and counts against DAILY_LIMIT,
+which resets at midnight UTC. Waiting callers are served in priority
+order: INTERACTIVE lookups always go before queued BATCH work, so a bulk
+job can never starve the user at the prompt. The bucket is saved in the
+API cache database after every request and reloaded on start, so
+restarting the app does not hand out a fresh quota.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import requests
+from storage import api_cache
+
+INTERACTIVE = 0
+BATCH = 1
+
+RATE_PER_SECOND = float(os.getenv("OMDB_RATE_PER_SECOND", "5"))
+BURST = int(os.getenv("OMDB_BURST", "5"))
+DAILY_LIMIT = int(os.getenv("OMDB_DAILY_LIMIT", "1000"))
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """Raised when the daily quota is used up or a wait times out"""
+
+
+def _utc_day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _seconds_until_utc_midnight(timestamp):
+    return 86400 - timestamp % 86400
+
+
+class TokenBucketScheduler:
+    """Priority-ordered, persistent token bucket"""
+
+    def __init__(self, name="omdb", rate_per_second=RATE_PER_SECOND,
+                 burst=BURST, daily_limit=DAILY_LIMIT, persist=True):
+        self.name = name
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.daily_limit = daily_limit
+        self.persist = persist
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._state = None
+
+    def _load(self, now):
+        if self._state is not None:
+            return
+        state = api_cache.load_rate_limit_state(self.name) if self.persist else None
+        self._state = state or {
+            "tokens": float(self.burst),
+            "updated_at": now,
+            "day": _utc_day(now),
+            "used_today": 0,
+        }
+
+    def _refill(self, now):
+        state = self._state
+        elapsed = max(0.0, now - state["updated_at"])
+        state["tokens"] = min(
+            float(self.burst), state["tokens"] + elapsed * self.rate_per_second
+        )
+        state["updated_at"] = now
+        if state["day"] != _utc_day(now):
+            state["day"] = _utc_day(now)
+            state["used_today"] = 0
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """
+        Wait for a token and take it.
+
+        Parameters:
+            priority (int): INTERACTIVE or BATCH; lower runs first
+            timeout (float): Give up after this many seconds
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If today's quota is used up, or the
+                timeout passes first
+        """
+        start = time.time()
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            self._load(start)
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.time()
+                    self._refill(now)
+                    state = self._state
+
+                    if state["used_today"] >= self.daily_limit:
+                        raise RateLimitExceeded(
+                            f"Daily OMDb quota of {self.daily_limit} requests "
+                            f"used up; resets in "
+                            f"{_seconds_until_utc_midnight(now) / 3600:.1f}h"
+                        )
+
+                    is_next = self._waiting[0] == ticket
+                    if is_next and state["tokens"] >= 1:
+                        state["tokens"] -= 1
+                        state["used_today"] += 1
+                        if self.persist:
+                            api_cache.save_rate_limit_state(self.name, state)
+                        return now - start
+
+                    wait = None
+                    if is_next:
+                        wait = (1 - state["tokens"]) / self.rate_per_second
+                    if timeout is not None:
+                        remaining = start + timeout - now
+                        if remaining <= 0:
+                            raise RateLimitExceeded(
+                                "Timed out waiting for an OMDb request slot"
+                            )
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def status(self):
+        """
+        Describe the current quota.
+
+        Returns:
+            dict: "tokens" available now, "daily_remaining" requests,
+                "queued" callers per priority, "wait_seconds" until a new
+                caller at INTERACTIVE priority would get a token, and
+                "resets_in" seconds until the daily quota resets
+        """
+        with self._cond:
+            now = time.time()
+            self._load(now)
+            self._refill(now)
+            state = self._state
+            daily_remaining = max(0, self.daily_limit - state["used_today"])
+            queued_interactive = sum(
+                1 for priority, _ in self._waiting if priority == INTERACTIVE
+            )
+            ahead = queued_interactive + 1
+            wait_seconds = max(0.0, (ahead - state["tokens"]) / self.rate_per_second)
+            if not daily_remaining:
+                wait_seconds = _seconds_until_utc_midnight(now)
+            return {
+                "tokens": int(state["tokens"]),
+                "daily_remaining": daily_remaining,
+                "queued": {
+                    "interactive": queued_interactive,
+                    "batch": len(self._waiting) - queued_interactive,
+                },
+                "wait_seconds": wait_seconds,
+                "resets_in": _seconds_until_utc_midnight(now),
+            }
+
+
+scheduler = TokenBucketScheduler()
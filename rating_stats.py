@@ -0,0 +1,103 @@
+"""
+Running rating statistics kept up to date on every catalog change
+"""
+
+from bisect import bisect_left, insort
+
+
+def _hundredths(rating):
+    return round(rating * 100)
+
+
+class RatingStats:
+    """
+    Incrementally maintained mean, median, best and worst ratings.
+
+    Movies are grouped per bucket of one hundredth (at most 1001 buckets
+    for 0.00-10.00), each holding the set of titles with that rating.
+    The sum is kept in integer hundredths so the mean never drifts, the
+    median walks the sorted buckets, and best and worst read the first
+    and last bucket directly.
+    """
+
+    def __init__(self):
+        self._sum_hundredths = 0
+        self._count = 0
+        self._titles = {}
+        self._buckets = []
+
+    @classmethod
+    def from_movies(cls, movies_dict):
+        """Build the statistics for an existing {title: details} mapping"""
+        stats = cls()
+        for title, details in movies_dict.items():
+            stats.add(details["rating"], title)
+        return stats
+
+    def __len__(self):
+        return self._count
+
+    def add(self, rating, title):
+        """Account for a new movie"""
+        bucket = _hundredths(rating)
+        self._sum_hundredths += bucket
+        self._count += 1
+        titles = self._titles.get(bucket)
+        if titles is None:
+            titles = self._titles[bucket] = set()
+            insort(self._buckets, bucket)
+        titles.add(title)
+
+    def remove(self, rating, title):
+        """Forget a deleted movie"""
+        bucket = _hundredths(rating)
+        self._sum_hundredths -= bucket
+        self._count -= 1
+        titles = self._titles[bucket]
+        titles.discard(title)
+        if not titles:
+            del self._titles[bucket]
+            del self._buckets[bisect_left(self._buckets, bucket)]
+
+    def update(self, old_rating, new_rating, title):
+        """Move a movie from its old rating to the new one"""
+        self.remove(old_rating, title)
+        self.add(new_rating, title)
+
+    def average(self):
+        """Mean rating, or None without movies"""
+        if not self._count:
+            return None
+        return self._sum_hundredths / 100 / self._count
+
+    def _rating_at(self, index):
+        """Rating of the movie at a position in rating order"""
+        seen = 0
+        for bucket in self._buckets:
+            seen += len(self._titles[bucket])
+            if index < seen:
+                return bucket / 100
+        raise IndexError(index)
+
+    def median(self):
+        """Median rating, or None without movies"""
+        if not self._count:
+            return None
+        middle = self._count // 2
+        if self._count % 2:
+            return self._rating_at(middle)
+        return (self._rating_at(middle) + self._rating_at(middle - 1)) / 2
+
+    def best(self):
+        """(rating, sorted titles) of the highest rated movies"""
+        if not self._buckets:
+            return None, []
+        bucket = self._buckets[-1]
+        return bucket / 100, sorted(self._titles[bucket])
+
+    def worst(self):
+        """(rating, sorted titles) of the lowest rated movies"""
+        if not self._buckets:
+            return None, []
+        bucket = self._buckets[0]
+        return bucket / 100, sorted(self._titles[bucket])
@@ -0,0 +1,224 @@
+"""
+Resumable refresh of stale OMDb data
+
+Re-queries OMDb for movies whose last_fetched timestamp is older than
+N days (or was never set) and writes back only the fields that changed.
+Lookups are limited to the stored year, which is never rewritten.
+Movies are processed in id order, one batch at a time; after each batch
+is committed the last processed id is saved to a checkpoint file, so an
+interrupted run picks up where it stopped. Only API-sourced movies (the
+ones with a poster URL) are refreshed, so manual entries keep the
+ratings their owner typed in.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from colorama import Fore, Style
+from sqlalchemy import text
+from movie_api import get_movies_from_api_batch
+from storage import movie_storage_sql as storage
+from storage.database import project_root
+
+CHECKPOINT_PATH = os.path.join(project_root, "data", "refresh_checkpoint.json")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Columns a refresh may rewrite, see changed_fields
+FIELDS = ("rating", "poster_url")
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def load_checkpoint(checkpoint_path=CHECKPOINT_PATH):
+    """Return the saved {"cutoff", "last_id", ...} dict, or None"""
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as fileobject:
+            return json.load(fileobject)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(checkpoint, checkpoint_path=CHECKPOINT_PATH):
+    """Write the checkpoint atomically (temp file + rename)"""
+    temp_path = f"{checkpoint_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as fileobject:
+        json.dump(checkpoint, fileobject)
+    os.replace(temp_path, checkpoint_path)
+
+
+def find_stale_movies(cutoff, after_id, limit):
+    """Next batch of API-sourced movies fetched before `cutoff`"""
+    with storage.engine.connect() as conn:
+        return conn.execute(
+            text(
+                "SELECT id, title, year, rating, poster_url FROM movies "
+                "WHERE id > :after_id AND poster_url != '' "
+                "AND (last_fetched IS NULL OR last_fetched < :cutoff) "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"after_id": after_id, "cutoff": cutoff, "limit": limit},
+        ).fetchall()
+
+
+def same_movie(row, result):
+    """
+    Whether an API result is the stored movie and not a namesake.
+
+    The lookup asks OMDb for the stored year, so a result from another
+    year means OMDb matched a different film.
+    """
+    year = result[1]
+    return not year or not row.year or year == row.year
+
+
+def changed_fields(row, result):
+    """
+    Compare a stored row with a fresh API result.
+
+    The year identifies the movie and is never rewritten. Values OMDb
+    reports as N/A (which _request_movie turns into a rating of 0.0)
+    count as no change, so a refresh never overwrites real stored data
+    with a placeholder.
+
+    Returns:
+        dict: rating/poster_url values that differ, None otherwise
+    """
+    _, _, rating, poster_url = result
+    if poster_url == "N/A":
+        poster_url = ""
+    return {
+        "rating": rating if rating and rating != row.rating else None,
+        "poster_url": (
+            poster_url if poster_url and poster_url != row.poster_url else None
+        ),
+    }
+
+
+def apply_refresh(updates):
+    """
+    Write one batch of refreshed rows in a single transaction.
+
+    Rows without changes only get a new last_fetched, so they keep
+    their cached site fragment.
+    """
+    if not updates:
+        return
+    changed = [update for update in updates
+               if any(update[field] is not None for field in FIELDS)]
+    unchanged = [update for update in updates
+                 if all(update[field] is None for field in FIELDS)]
+    with storage.engine.begin() as conn:
+        if changed:
+            conn.execute(
+                text(
+                    "UPDATE movies SET "
+                    "rating = COALESCE(:rating, rating), "
+                    "poster_url = COALESCE(:poster_url, poster_url), "
+                    "last_fetched = :fetched_at "
+                    "WHERE id = :id"
+                ),
+                changed,
+            )
+        if unchanged:
+            conn.execute(
+                text("UPDATE movies SET last_fetched = :fetched_at WHERE id = :id"),
+                unchanged,
+            )
+
+
+def refresh_stale_movies(max_age_days=30, max_concurrency=4, batch_size=50,
+                         restart=False, checkpoint_path=CHECKPOINT_PATH):
+    """
+    Refresh every stale movie, resuming from the checkpoint if one exists.
+
+    Parameters:
+        max_age_days (int): Refresh movies fetched more than this long ago
+        max_concurrency (int): OMDb requests in flight per batch
+        batch_size (int): Movies looked up and committed per batch
+        restart (bool): Ignore an existing checkpoint and start over
+        checkpoint_path (str): Where progress is saved between batches
+
+    Returns:
+        dict: Counts of "checked", "changed", "unchanged" and "failed"
+            movies for this run
+    """
+    storage.flush_writes()
+
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint:
+        print(
+            f"{Fore.YELLOW}{Style.BRIGHT}Resuming refresh after movie id "
+            f"{checkpoint['last_id']}{Style.RESET_ALL}"
+        )
+    else:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+        checkpoint = {
+            "cutoff": cutoff.strftime(TIMESTAMP_FORMAT),
+            "last_id": 0,
+            "checked": 0,
+            "changed": 0,
+            "unchanged": 0,
+            "failed": 0,
+        }
+
+    while True:
+        rows = find_stale_movies(checkpoint["cutoff"], checkpoint["last_id"],
+                                 batch_size)
+        if not rows:
+            break
+
+        results = get_movies_from_api_batch(
+            [row.title for row in rows],
+            max_concurrency=max_concurrency,
+            use_cache=False,
+            years=[row.year or None for row in rows],
+        )
+
+        fetched_at = _utc_now()
+        updates = []
+        for row, item in zip(rows, results):
+            checkpoint["checked"] += 1
+            if item["error"]:
+                checkpoint["failed"] += 1
+                continue
+            if not same_movie(row, item["result"]):
+                checkpoint["failed"] += 1
+                print(
+                    f"{Fore.YELLOW}Skipping '{row.title}' ({row.year}): "
+                    f"OMDb returned {item['result'][0]} "
+                    f"({item['result'][1]}){Style.RESET_ALL}"
+                )
+                continue
+
+            changes = changed_fields(row, item["result"])
+            if any(changes[field] is not None for field in FIELDS):
+                checkpoint["changed"] += 1
+            else:
+                checkpoint["unchanged"] += 1
+            updates.append({**changes, "id": row.id, "fetched_at": fetched_at})
+
+        apply_refresh(updates)
+        checkpoint["last_id"] = rows[-1].id
+        save_checkpoint(checkpoint, checkpoint_path)
+
+        print(
+            f"{Fore.BLUE}Checked {checkpoint['checked']} movies: "
+            f"{checkpoint['changed']} changed, "
+            f"{checkpoint['failed']} failed{Style.RESET_ALL}"
+        )
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    summary = {key: checkpoint[key]
+               for key in ("checked", "changed", "unchanged", "failed")}
+    print(
+        f"{Fore.GREEN}{Style.BRIGHT}Refresh complete: "
+        f"{summary['checked']} checked, {summary['changed']} changed, "
+        f"{summary['unchanged']} unchanged, {summary['failed']} failed"
+        f"{Style.RESET_ALL}"
+    )
+    return summary
@@ -0,0 +1,446 @@
+"""
+Prebuilt static search index for the generated website
+
+Written next to the site as small JSON files, so static/search.js can
+search the catalog in the browser while downloading only what a query
+needs:
+
+- terms-<hex>.json: inverted index from title terms to movie ids,
+  sharded by the first character of the term. Terms are the first
+  letter and the trigrams of every normalised title word, with a leading
+  space marking the start of a word (" ma", "mat", "atr", ...). Id lists
+  are sorted and delta-encoded.
+- docs-<n>.json: title, year and rating per movie id, DOC_SHARD_SIZE
+  ids per file.
+- meta.json: shard size and movie counts per decade and rating facet.
+
+The index files double as the stored postings: triggers record which
+movies changed since the last build, and an update only reads back and
+rewrites the docs and term shards those movies appear in, instead of
+scanning the whole table again.
+"""
+
+import json
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from sqlalchemy import bindparam, text
+
+INDEX_DIR = "search"
+DOC_SHARD_SIZE = 1000
+# Bump when the file layout changes, so existing indexes are rebuilt
+INDEX_FORMAT = "3"
+INDEX_FILE_PATTERN = re.compile(r"^(terms-[0-9a-f]+|docs-\d+|meta)\.json$")
+
+
+def normalize(title):
+    """Lowercase, strip accents and reduce punctuation to single spaces"""
+    title = unicodedata.normalize("NFKD", title.lower())
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    return re.sub(r"[\W_]+", " ", title).strip()
+
+
+def word_terms(word):
+    """Index terms of one normalised word: its first letter, then trigrams"""
+    padded = " " + word
+    return [padded[:2]] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def shard_name(term):
+    """File holding a term: named after its first non-space character"""
+    return f"terms-{ord(term.lstrip()[0]):x}.json"
+
+
+def _encode(ids):
+    """Delta-encode a sorted id list"""
+    previous = 0
+    deltas = []
+    for movie_id in ids:
+        deltas.append(movie_id - previous)
+        previous = movie_id
+    return deltas
+
+
+def _decode(deltas):
+    ids = []
+    movie_id = 0
+    for delta in deltas:
+        movie_id += delta
+        ids.append(movie_id)
+    return ids
+
+
+def title_terms(title):
+    """Set of index terms of every word of a title"""
+    terms = set()
+    for word in normalize(title).split():
+        terms.update(word_terms(word))
+    return terms
+
+
+def _read_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as fileobject:
+            return json.load(fileobject)
+    except FileNotFoundError:
+        return default
+
+
+def _write_if_changed(path, data):
+    """
+    Write compact JSON atomically, unless the file already holds it.
+
+    Returns:
+        tuple: (bytes in the file, whether it was written)
+    """
+    content = json.dumps(data, separators=(",", ":"), ensure_ascii=False,
+                         sort_keys=True)
+    content = content.encode("utf-8")
+    try:
+        with open(path, "rb") as fileobject:
+            if fileobject.read() == content:
+                return len(content), False
+    except FileNotFoundError:
+        pass
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as fileobject:
+        fileobject.write(content)
+    os.replace(temp_path, path)
+    return len(content), True
+
+
+def _write_meta(index_dir, facets):
+    return _write_if_changed(os.path.join(index_dir, "meta.json"), {
+        "format": INDEX_FORMAT,
+        "doc_shard_size": DOC_SHARD_SIZE,
+        "facets": {
+            facet: {str(value): count for value, count in sorted(counts.items())
+                    if count}
+            for facet, counts in facets.items()
+        },
+    })
+
+
+def _index_stats(index_dir, written):
+    sizes = [
+        os.path.getsize(os.path.join(index_dir, file_name))
+        for file_name in os.listdir(index_dir)
+        if INDEX_FILE_PATTERN.match(file_name)
+    ]
+    return {"files": len(sizes), "written": written, "bytes": sum(sizes)}
+
+
+def build_search_index(engine, index_dir=INDEX_DIR, full=False):
+    """
+    Build or update the search index from the movies table.
+
+    Movies changed since the last build are listed in the
+    search_index_changes table (filled by triggers). Only the docs and
+    term shards those movies appear in, before or after the change, are
+    read back and rewritten; the files on disk are the stored postings.
+    The whole table is read again only for a new or outdated index, or
+    when most movies changed.
+
+    Parameters:
+        engine: SQLAlchemy engine of the movies database
+        index_dir (str): Directory for the index files
+        full (bool): Rebuild everything from the movies table
+
+    Returns:
+        dict: "files" in the index, how many were "written", and their
+            total size in "bytes"
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    with engine.connect() as connection:
+        last_seq = connection.execute(
+            text("SELECT COALESCE(MAX(seq), 0) FROM search_index_changes")
+        ).scalar_one()
+        changed_ids = connection.execute(
+            text("SELECT movie_id FROM search_index_changes WHERE seq <= :seq"),
+            {"seq": last_seq},
+        ).scalars().all()
+
+    meta = _read_json(os.path.join(index_dir, "meta.json"), None)
+    indexed = 0
+    if meta and meta.get("format") == INDEX_FORMAT \
+            and meta.get("doc_shard_size") == DOC_SHARD_SIZE:
+        indexed = sum(meta["facets"]["decade"].values())
+
+    if full or not indexed or len(changed_ids) * 4 > indexed:
+        stats = _build_all(engine, index_dir)
+    else:
+        stats = _build_changes(engine, index_dir, meta, changed_ids)
+
+    with engine.begin() as connection:
+        connection.execute(
+            text("DELETE FROM search_index_changes WHERE seq <= :seq"),
+            {"seq": last_seq},
+        )
+    return stats
+
+
+def _build_all(engine, index_dir):
+    """Write every index file from a full scan of the movies table"""
+    postings = defaultdict(list)
+    facets = {"decade": defaultdict(int), "rating": defaultdict(int)}
+    files = {}
+
+    def add_file(name, data):
+        files[name] = _write_if_changed(os.path.join(index_dir, name), data)
+
+    with engine.connect() as connection:
+        rows = connection.execution_options(
+            stream_results=True, yield_per=DOC_SHARD_SIZE
+        ).execute(text("SELECT id, title, year, rating FROM movies ORDER BY id"))
+
+        docs = {}
+        docs_shard = None
+        for movie_id, title, year, rating in rows:
+            if movie_id // DOC_SHARD_SIZE != docs_shard:
+                if docs:
+                    add_file(f"docs-{docs_shard}.json", docs)
+                docs = {}
+                docs_shard = movie_id // DOC_SHARD_SIZE
+            docs[str(movie_id)] = [title, year, rating]
+
+            for term in title_terms(title):
+                # Rows arrive in id order, so every list stays sorted
+                postings[term].append(movie_id)
+
+            facets["decade"][year // 10 * 10] += 1
+            facets["rating"][int(rating)] += 1
+        if docs:
+            add_file(f"docs-{docs_shard}.json", docs)
+
+    shards = defaultdict(dict)
+    for term, ids in postings.items():
+        shards[shard_name(term)][term] = _encode(ids)
+    for name, shard in shards.items():
+        add_file(name, shard)
+
+    files["meta.json"] = _write_meta(index_dir, facets)
+
+    # Shards of terms or ids that no longer exist
+    for file_name in os.listdir(index_dir):
+        if INDEX_FILE_PATTERN.match(file_name) and file_name not in files:
+            os.remove(os.path.join(index_dir, file_name))
+
+    return {
+        "files": len(files),
+        "written": sum(written for _, written in files.values()),
+        "bytes": sum(size for size, _ in files.values()),
+    }
+
+
+def _build_changes(engine, index_dir, meta, changed_ids):
+    """Patch the files holding the given movies, see build_search_index"""
+    new_docs = {}
+    with engine.connect() as connection:
+        for start in range(0, len(changed_ids), 500):
+            rows = connection.execute(
+                text(
+                    "SELECT id, title, year, rating FROM movies WHERE id IN :ids"
+                ).bindparams(bindparam("ids", expanding=True)),
+                {"ids": changed_ids[start:start + 500]},
+            )
+            for movie_id, title, year, rating in rows:
+                new_docs[movie_id] = [title, year, rating]
+
+    facets = {
+        facet: defaultdict(int, {int(value): count
+                                 for value, count in counts.items()})
+        for facet, counts in meta["facets"].items()
+    }
+    docs_files = {}
+    removed = defaultdict(set)
+    added = defaultdict(set)
+
+    for movie_id in changed_ids:
+        name = f"docs-{movie_id // DOC_SHARD_SIZE}.json"
+        if name not in docs_files:
+            docs_files[name] = _read_json(os.path.join(index_dir, name), {})
+        docs = docs_files[name]
+
+        old = docs.pop(str(movie_id), None)
+        if old is not None:
+            title, year, rating = old
+            for term in title_terms(title):
+                removed[term].add(movie_id)
+            facets["decade"][year // 10 * 10] -= 1
+            facets["rating"][int(rating)] -= 1
+
+        new = new_docs.get(movie_id)
+        if new is not None:
+            title, year, rating = new
+            docs[str(movie_id)] = new
+            for term in title_terms(title):
+                added[term].add(movie_id)
+            facets["decade"][year // 10 * 10] += 1
+            facets["rating"][int(rating)] += 1
+
+    terms_by_shard = defaultdict(set)
+    for term in removed.keys() | added.keys():
+        terms_by_shard[shard_name(term)].add(term)
+
+    written = 0
+
+    def save(name, data):
+        nonlocal written
+        path = os.path.join(index_dir, name)
+        if data:
+            written += _write_if_changed(path, data)[1]
+        elif os.path.exists(path):
+            os.remove(path)
+            written += 1
+
+    for name, terms in terms_by_shard.items():
+        shard = _read_json(os.path.join(index_dir, name), {})
+        for term in terms:
+            ids = set(_decode(shard.get(term, [])))
+            ids -= removed[term]
+            ids |= added[term]
+            if ids:
+                shard[term] = _encode(sorted(ids))
+            else:
+                shard.pop(term, None)
+        save(name, shard)
+
+    for name, docs in docs_files.items():
+        save(name, docs)
+    written += _write_meta(index_dir, facets)[1]
+
+    return _index_stats(index_dir, written)
+
+
+def search(query, index_dir=INDEX_DIR, limit=20, decade=None, rating=None,
+           loaded=None):
+    """
+    Query a built index the way static/search.js does.
+
+    Every query word must start a word of the title.
+
+    Parameters:
+        query (str): Search text
+        index_dir (str): Directory of the index files
+        limit (int): Maximum number of results
+        decade (int): Only movies from this decade, e.g. 1990
+        rating (int): Only movies rated from this value to the next
+        loaded (dict): File cache shared between calls; files read are
+            added to it
+
+    Returns:
+        list: dicts with "id", "title", "year" and "rating", in id order
+    """
+    loaded = {} if loaded is None else loaded
+
+    def load(name):
+        if name not in loaded:
+            try:
+                with open(os.path.join(index_dir, name), encoding="utf-8") as fileobject:
+                    loaded[name] = json.load(fileobject)
+            except FileNotFoundError:
+                loaded[name] = {}
+        return loaded[name]
+
+    words = normalize(query).split()
+    if not words:
+        return []
+
+    candidates = None
+    for word in words:
+        for term in word_terms(word):
+            ids = set(_decode(load(shard_name(term)).get(term, [])))
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+    doc_shard_size = load("meta.json")["doc_shard_size"]
+    results = []
+    for movie_id in sorted(candidates):
+        docs = load(f"docs-{movie_id // doc_shard_size}.json")
+        title, year, movie_rating = docs[str(movie_id)]
+        title_words = normalize(title).split()
+        if not all(any(title_word.startswith(word) for title_word in title_words)
+                   for word in words):
+            continue
+        if decade is not None and year // 10 * 10 != decade:
+            continue
+        if rating is not None and int(movie_rating) != rating:
+            continue
+        results.append(
+            {"id": movie_id, "title": title, "year": year, "rating": movie_rating}
+        )
+        if len(results) >= limit:
+            break
+    return results
+
+
+if __name__ == "__main__":
+    # Size and lookup benchmark: python search_index.py [number_of_movies]
+    import random
+    import sys
+    import tempfile
+    import time
+    from storage.database import get_engine
+    from storage.migrations import run_migrations
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    words = ("star", "night", "return", "dark", "love", "city", "king", "last",
+             "house", "blood", "river", "ghost", "summer", "matrix", "dune")
+    generator = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = get_engine(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+        run_migrations(engine)
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO movies (title, year, rating, poster_url) "
+                    "VALUES (:title, :year, :rating, '')"
+                ),
+                [
+                    {"title": " ".join(generator.sample(words, 3)).title() + f" {i}",
+                     "year": 1900 + i % 125, "rating": (i % 100) / 10}
+                    for i in range(count)
+                ],
+            )
+
+        index_dir = os.path.join(directory, "search")
+        start = time.perf_counter()
+        stats = build_search_index(engine, index_dir)
+        build_seconds = time.perf_counter() - start
+
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE movies SET title = 'Dune Messiah' WHERE id = 1"))
+        start = time.perf_counter()
+        rebuild = build_search_index(engine, index_dir)
+        rebuild_seconds = time.perf_counter() - start
+
+        sizes = sorted(
+            os.path.getsize(os.path.join(index_dir, name))
+            for name in os.listdir(index_dir) if name.startswith("terms-")
+        )
+        queries = ["ma", "dark kin", "ghost river", "summ", "matrix 4", "zzz"]
+        start = time.perf_counter()
+        fetched = 0
+        for query in queries:
+            loaded = {}
+            search(query, index_dir, loaded=loaded)
+            fetched += sum(
+                os.path.getsize(os.path.join(index_dir, name))
+                for name, data in loaded.items() if data
+            )
+        lookup_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        engine.dispose()
+
+    print(f"{count} movies")
+    print(f"build:   {build_seconds:6.2f} s, {stats['files']} files, "
+          f"{stats['bytes'] / 2**20:.1f} MiB")
+    print(f"rebuild after one edit: {rebuild_seconds:6.2f} s, "
+          f"{rebuild['written']} files rewritten")
+    print(f"term shards: {len(sizes)}, largest {sizes[-1] / 1024:.0f} KiB, "
+          f"median {sizes[len(sizes) // 2] / 1024:.0f} KiB")
+    print(f"cold lookup: {lookup_ms:.1f} ms and "
+          f"{fetched / len(queries) / 1024:.0f} KiB loaded per query")
@@ -0,0 +1,87 @@
+"""
+Single-flight request coalescing
+
+When several threads ask for the same key at the same time, only the
+first one runs the work; the others wait for it and receive the same
+result, or the same exception.
+"""
+
+import threading
+
+
+class _Call:
+    """One in-flight piece of work and the callers waiting on it"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key, func):
+        """
+        Run func() unless a call for `key` is already in flight.
+
+        Parameters:
+            key: Hashable identity of the work
+            func: Zero-argument callable doing the work
+
+        Returns:
+            The result of func(), possibly computed by another thread
+
+        Raises:
+            Whatever func() raised, in every caller that shared the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        """
+        Return call counters since start (or the last reset).
+
+        Returns:
+            dict: "executed" calls that did the work and "shared" calls
+                that reused an in-flight result
+        """
+        with self._lock:
+            return {"executed": self._executed, "shared": self._shared}
+
+    def reset_stats(self):
+        """Zero the counters"""
+        with self._lock:
+            self._executed = 0
+            self._shared = 0
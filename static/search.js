@@ -0,0 +1,131 @@
+/*
+ * Search over the prebuilt index written by search_index.py.
+ * Only the term shards a query needs, and the docs shards of its
+ * results, are downloaded; every file is fetched at most once.
+ */
+(function () {
+    "use strict";
+
+    // Must match search_index.normalize()
+    function normalize(text) {
+        return text.toLowerCase().normalize("NFKD")
+            .replace(/[\u0300-\u036f]/g, "")
+            .replace(/[^\p{L}\p{N}]+/gu, " ")
+            .trim();
+    }
+
+    // Must match search_index.word_terms()
+    function wordTerms(word) {
+        const padded = " " + word;
+        const terms = [padded.slice(0, 2)];
+        for (let i = 0; i + 3 <= padded.length; i++) {
+            terms.push(padded.slice(i, i + 3));
+        }
+        return terms;
+    }
+
+    function shardName(term) {
+        return "terms-" + term.trim().codePointAt(0).toString(16) + ".json";
+    }
+
+    function decode(deltas) {
+        let id = 0;
+        return deltas.map(function (delta) {
+            id += delta;
+            return id;
+        });
+    }
+
+    function MovieSearch(indexUrl) {
+        this.indexUrl = indexUrl.replace(/\/?$/, "/");
+        this.files = {};
+    }
+
+    MovieSearch.prototype.load = function (name) {
+        if (!this.files[name]) {
+            this.files[name] = fetch(this.indexUrl + name).then(function (response) {
+                return response.ok ? response.json() : {};
+            });
+        }
+        return this.files[name];
+    };
+
+    /*
+     * Movies whose title has a word starting with every query word.
+     * options: limit, decade (e.g. 1990), rating (e.g. 8 for 8.0-8.9)
+     */
+    MovieSearch.prototype.search = async function (query, options) {
+        options = options || {};
+        const words = normalize(query).split(" ").filter(Boolean);
+        if (!words.length) {
+            return [];
+        }
+
+        const terms = [].concat.apply([], words.map(wordTerms));
+        const shards = await Promise.all(terms.map(function (term) {
+            return this.load(shardName(term));
+        }, this));
+
+        let candidates = null;
+        for (let i = 0; i < terms.length; i++) {
+            const ids = new Set(decode(shards[i][terms[i]] || []));
+            candidates = candidates === null ? ids : new Set(
+                Array.from(candidates).filter(function (id) { return ids.has(id); })
+            );
+            if (!candidates.size) {
+                return [];
+            }
+        }
+
+        const meta = await this.load("meta.json");
+        const limit = options.limit || 20;
+        const results = [];
+        const sorted = Array.from(candidates).sort(function (a, b) { return a - b; });
+        for (const id of sorted) {
+            const docs = await this.load(
+                "docs-" + Math.floor(id / meta.doc_shard_size) + ".json"
+            );
+            const [title, year, rating] = docs[id];
+            const titleWords = normalize(title).split(" ");
+            const matches = words.every(function (word) {
+                return titleWords.some(function (titleWord) {
+                    return titleWord.startsWith(word);
+                });
+            });
+            if (!matches
+                    || (options.decade != null && Math.floor(year / 10) * 10 !== options.decade)
+                    || (options.rating != null && Math.floor(rating) !== options.rating)) {
+                continue;
+            }
+            results.push({id: id, title: title, year: year, rating: rating});
+            if (results.length >= limit) {
+                break;
+            }
+        }
+        return results;
+    };
+
+    window.MovieSearch = MovieSearch;
+
+    document.addEventListener("DOMContentLoaded", function () {
+        const input = document.getElementById("movie-search");
+        const list = document.getElementById("movie-search-results");
+        if (!input || !list) {
+            return;
+        }
+        const index = new MovieSearch(input.dataset.index);
+        let latest = 0;
+        input.addEventListener("input", async function () {
+            const ticket = ++latest;
+            const results = await index.search(input.value);
+            if (ticket !== latest) {
+                return;
+            }
+            list.replaceChildren.apply(list, results.map(function (movie) {
+                const item = document.createElement("li");
+                item.textContent = movie.title + " (" + movie.year + ") " + movie.rating;
+                return item;
+            }));
+        });
+    });
+}());
@@ -0,0 +1,355 @@
+"""
+Persistent cache of OMDb lookups
+
+Parsed (title, year, rating, poster_url) results are stored in a SQLite
+database next to movies.db, keyed by the normalised search title. Every
+entry has its own expiry; "not found" answers are cached too, with a
+shorter TTL. When the cache grows past MAX_ENTRIES the least recently
+used entries are evicted. Hit/miss counters are persisted so they can be
+inspected from the CLI (python main.py cache-stats).
+
+The same database also keeps the API rate limiter's token bucket, so
+quotas survive restarts, and the candidate titles seen in OMDb search
+results, which title_resolver ranks locally to fix typos offline.
+"""
+
+import os
+import re
+import time
+from sqlalchemy import text
+from storage.database import project_root, get_engine
+
+CACHE_URL = os.getenv(
+    "OMDB_CACHE_URL",
+    f"sqlite:///{os.path.join(project_root, 'data', 'api_cache.db')}",
+)
+
+# Seconds a found movie / a "not found" answer stays valid
+CACHE_TTL = 30 * 24 * 3600
+NEGATIVE_CACHE_TTL = 24 * 3600
+# Entries kept before least recently used ones are evicted
+MAX_ENTRIES = 10000
+# Candidate titles kept for fuzzy resolution
+MAX_CANDIDATES = 20000
+
+COUNTERS = ("hits", "negative_hits", "misses", "expired", "evictions")
+
+_engine = None
+
+
+def normalize_key(search_title):
+    """Cache key for a title: casefolded with whitespace collapsed"""
+    return re.sub(r"\s+", " ", search_title).strip().casefold()
+
+
+def get_cache_engine():
+    """Return the cache engine, creating its tables on first use"""
+    global _engine
+    if _engine is None:
+        engine = get_engine(CACHE_URL)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS api_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        found INTEGER NOT NULL,
+                        title TEXT,
+                        year INTEGER,
+                        rating REAL,
+                        poster_url TEXT,
+                        expires_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                    """
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS idx_api_cache_last_access "
+                    "ON api_cache (last_access)"
+                )
+            )
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS api_cache_counters (
+                        name TEXT PRIMARY KEY,
+                        value INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+            )
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS api_candidates (
+                        normalized_title TEXT NOT NULL,
+                        year INTEGER NOT NULL,
+                        title TEXT NOT NULL,
+                        last_seen REAL NOT NULL,
+                        PRIMARY KEY (normalized_title, year)
+                    )
+                    """
+                )
+            )
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS api_rate_limit (
+                        name TEXT PRIMARY KEY,
+                        tokens REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        day TEXT NOT NULL,
+                        used_today INTEGER NOT NULL
+                    )
+                    """
+                )
+            )
+        _engine = engine
+    return _engine
+
+
+def _count(conn, name):
+    conn.execute(
+        text(
+            "INSERT INTO api_cache_counters (name, value) VALUES (:name, 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1"
+        ),
+        {"name": name},
+    )
+
+
+def get(search_title):
+    """
+    Look up a cached API answer.
+
+    Returns:
+        tuple: (hit, result) where hit is False on a miss, and result is
+            (Title, Year, imdbRating, Poster) or None for a cached
+            "not found"
+    """
+    key = normalize_key(search_title)
+    now = time.time()
+    with get_cache_engine().begin() as conn:
+        row = conn.execute(
+            text(
+                "SELECT found, title, year, rating, poster_url, expires_at "
+                "FROM api_cache WHERE cache_key = :key"
+            ),
+            {"key": key},
+        ).fetchone()
+
+        if row is None:
+            _count(conn, "misses")
+            return False, None
+
+        if row[5] <= now:
+            conn.execute(
+                text("DELETE FROM api_cache WHERE cache_key = :key"), {"key": key}
+            )
+            _count(conn, "expired")
+            _count(conn, "misses")
+            return False, None
+
+        conn.execute(
+            text("UPDATE api_cache SET last_access = :now WHERE cache_key = :key"),
+            {"now": now, "key": key},
+        )
+        if not row[0]:
+            _count(conn, "negative_hits")
+            return True, None
+
+        _count(conn, "hits")
+        return True, (row[1], row[2], row[3], row[4])
+
+
+def put(search_title, result, ttl=None):
+    """
+    Store an API answer.
+
+    Parameters:
+        search_title (str): Title as it was searched
+        result (tuple): (Title, Year, imdbRating, Poster), or None to
+            cache "not found"
+        ttl (float): Seconds until expiry; defaults to CACHE_TTL or
+            NEGATIVE_CACHE_TTL
+    """
+    if ttl is None:
+        ttl = CACHE_TTL if result is not None else NEGATIVE_CACHE_TTL
+    title, year, rating, poster_url = result or (None, None, None, None)
+    now = time.time()
+
+    with get_cache_engine().begin() as conn:
+        conn.execute(
+            text(
+                "INSERT OR REPLACE INTO api_cache (cache_key, found, title, "
+                "year, rating, poster_url, expires_at, last_access) "
+                "VALUES (:key, :found, :title, :year, :rating, :poster_url, "
+                ":expires_at, :now)"
+            ),
+            {
+                "key": normalize_key(search_title),
+                "found": int(result is not None),
+                "title": title,
+                "year": year,
+                "rating": rating,
+                "poster_url": poster_url,
+                "expires_at": now + ttl,
+                "now": now,
+            },
+        )
+
+        size = conn.execute(text("SELECT COUNT(*) FROM api_cache")).scalar_one()
+        if size > MAX_ENTRIES:
+            evicted = conn.execute(
+                text(
+                    "DELETE FROM api_cache WHERE cache_key IN ("
+                    "SELECT cache_key FROM api_cache "
+                    "ORDER BY last_access LIMIT :excess)"
+                ),
+                {"excess": size - MAX_ENTRIES},
+            ).rowcount
+            conn.execute(
+                text(
+                    "INSERT INTO api_cache_counters (name, value) "
+                    "VALUES ('evictions', :evicted) "
+                    "ON CONFLICT (name) DO UPDATE SET value = value + :evicted"
+                ),
+                {"evicted": evicted},
+            )
+
+
+def stats():
+    """
+    Return the cache size and its persisted counters.
+
+    Returns:
+        dict: "entries", "negative_entries" and one key per COUNTERS name
+    """
+    with get_cache_engine().connect() as conn:
+        counters = dict(
+            conn.execute(text("SELECT name, value FROM api_cache_counters"))
+            .fetchall()
+        )
+        entries, negative = conn.execute(
+            text(
+                "SELECT COUNT(*), COALESCE(SUM(found = 0), 0) FROM api_cache"
+            )
+        ).fetchone()
+
+    result = {"entries": entries, "negative_entries": negative}
+    for name in COUNTERS:
+        result[name] = counters.get(name, 0)
+    return result
+
+
+def clear():
+    """Drop every cached entry and reset the counters"""
+    with get_cache_engine().begin() as conn:
+        conn.execute(text("DELETE FROM api_cache"))
+        conn.execute(text("DELETE FROM api_cache_counters"))
+
+
+def load_rate_limit_state(name):
+    """
+    Return a saved token bucket.
+
+    Returns:
+        dict: tokens, updated_at, day and used_today, or None if the
+            bucket was never saved
+    """
+    with get_cache_engine().connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT tokens, updated_at, day, used_today "
+                "FROM api_rate_limit WHERE name = :name"
+            ),
+            {"name": name},
+        ).fetchone()
+    return dict(row._mapping) if row else None
+
+
+def save_rate_limit_state(name, state):
+    """Persist a token bucket (see load_rate_limit_state)"""
+    with get_cache_engine().begin() as conn:
+        conn.execute(
+            text(
+                "INSERT OR REPLACE INTO api_rate_limit "
+                "(name, tokens, updated_at, day, used_today) "
+                "VALUES (:name, :tokens, :updated_at, :day, :used_today)"
+            ),
+            {"name": name, **state},
+        )
+
+
+def put_candidates(candidates):
+    """
+    Remember titles seen in OMDb answers for later fuzzy matching.
+
+    Parameters:
+        candidates (iterable): (title, year) pairs
+    """
+    now = time.time()
+    rows = [
+        {"normalized_title": normalize_key(title), "year": year or 0,
+         "title": title, "now": now}
+        for title, year in candidates
+        if title
+    ]
+    if not rows:
+        return
+
+    with get_cache_engine().begin() as conn:
+        conn.execute(
+            text(
+                "INSERT OR REPLACE INTO api_candidates "
+                "(normalized_title, year, title, last_seen) "
+                "VALUES (:normalized_title, :year, :title, :now)"
+            ),
+            rows,
+        )
+        conn.execute(
+            text(
+                "DELETE FROM api_candidates WHERE rowid IN ("
+                "SELECT rowid FROM api_candidates "
+                "ORDER BY last_seen DESC LIMIT -1 OFFSET :keep)"
+            ),
+            {"keep": MAX_CANDIDATES},
+        )
+
+
+def find_candidates(normalized_title):
+    """
+    Return the remembered candidates with exactly this normalised title.
+
+    Returns:
+        list: (normalized_title, year, title) tuples
+    """
+    with get_cache_engine().connect() as conn:
+        return [
+            tuple(row)
+            for row in conn.execute(
+                text(
+                    "SELECT normalized_title, year, title FROM api_candidates "
+                    "WHERE normalized_title = :normalized_title"
+                ),
+                {"normalized_title": normalized_title},
+            )
+        ]
+
+
+def load_candidates():
+    """
+    Return every remembered candidate.
+
+    Returns:
+        list: (normalized_title, year, title) tuples
+    """
+    with get_cache_engine().connect() as conn:
+        return [
+            tuple(row)
+            for row in conn.execute(
+                text("SELECT normalized_title, year, title FROM api_candidates")
+            )
+        ]
@@ -0,0 +1,74 @@
+"""
+Shared SQLAlchemy engine for the movies database
+
+Every module that talks to data/movies.db gets its engine from
+get_engine(), so the whole process shares one connection pool and every
+pooled connection is tuned with the same SQLite pragmas.
+"""
+
+import os
+from sqlalchemy import create_engine, event
+
+project_root = os.path.dirname(os.path.abspath(__file__))  # storage directory
+project_root = os.path.dirname(project_root)  # go up to project root
+DB_PATH = os.path.join(project_root, "data", "movies.db")
+DB_URL = os.getenv("MOVIES_DB_URL", f"sqlite:///{DB_PATH}")
+
+# Applied to every new connection. WAL lets the site generator read while
+# the CLI writes; NORMAL sync is safe under WAL and skips most fsyncs.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,  # negative means KiB, so ~20 MB
+    "mmap_size": 268435456,  # 256 MB
+    "busy_timeout": 5000,  # ms to wait on a locked database
+    "temp_store": "MEMORY",
+}
+
+_engines = {}
+
+
+def _set_pragmas(pragmas):
+    """Build a connect listener that applies the given pragmas"""
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def get_engine(db_url=None, echo=None, pragmas=None):
+    """
+    Return the shared engine for a database URL, creating it once.
+
+    Parameters:
+        db_url (str): Database URL, defaults to DB_URL
+        echo (bool): Log every statement; defaults to the MOVIES_DB_ECHO
+            environment variable, which is off unless set to "1"
+        pragmas (dict): Pragmas to apply instead of DEFAULT_PRAGMAS
+
+    Returns:
+        Engine: The same engine on every call with the same URL
+    """
+    db_url = db_url or DB_URL
+    if db_url in _engines:
+        return _engines[db_url]
+
+    if echo is None:
+        echo = os.getenv("MOVIES_DB_ECHO") == "1"
+
+    engine = create_engine(db_url, echo=echo, pool_pre_ping=True)
+    if db_url.startswith("sqlite"):
+        event.listen(
+            engine,
+            "connect",
+            _set_pragmas(DEFAULT_PRAGMAS if pragmas is None else pragmas),
+        )
+
+    _engines[db_url] = engine
+    return engine
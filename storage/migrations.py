@@ -0,0 +1,255 @@
+"""
+Versioned schema migrations for the movies database
+
+Each migration is a (version, description, statements) entry in
+MIGRATIONS. Applied versions are recorded in the schema_version table,
+so run_migrations() only executes the steps a database has not seen yet.
+New steps must be appended with the next version number; never edit a
+migration that has already shipped.
+"""
+
+from sqlalchemy import text
+
+MIGRATIONS = [
+    (
+        1,
+        "Create movies table",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS movies (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT UNIQUE NOT NULL,
+                year INTEGER NOT NULL,
+                rating REAL NOT NULL,
+                poster_url TEXT NOT NULL
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "Index year and rating",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_movies_year ON movies (year)",
+            "CREATE INDEX IF NOT EXISTS idx_movies_rating ON movies (rating)",
+        ],
+    ),
+    (
+        3,
+        "Full-text index over titles",
+        [
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+                title,
+                content='movies',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_fts_insert
+            AFTER INSERT ON movies BEGIN
+                INSERT INTO movies_fts (rowid, title) VALUES (new.id, new.title);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_fts_delete
+            AFTER DELETE ON movies BEGIN
+                INSERT INTO movies_fts (movies_fts, rowid, title)
+                VALUES ('delete', old.id, old.title);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_fts_update
+            AFTER UPDATE OF title ON movies BEGIN
+                INSERT INTO movies_fts (movies_fts, rowid, title)
+                VALUES ('delete', old.id, old.title);
+                INSERT INTO movies_fts (rowid, title) VALUES (new.id, new.title);
+            END
+            """,
+            "INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')",
+        ],
+    ),
+    (
+        4,
+        "Track when a movie was last fetched from OMDb",
+        [
+            # UTC 'YYYY-MM-DD HH:MM:SS'; NULL means never refreshed
+            "ALTER TABLE movies ADD COLUMN last_fetched TEXT",
+            "CREATE INDEX IF NOT EXISTS idx_movies_last_fetched "
+            "ON movies (last_fetched)",
+        ],
+    ),
+    (
+        5,
+        "Local poster thumbnails",
+        [
+            "ALTER TABLE movies ADD COLUMN poster_path TEXT",
+            "ALTER TABLE movies ADD COLUMN poster_width INTEGER",
+            "ALTER TABLE movies ADD COLUMN poster_height INTEGER",
+            # A new poster URL invalidates the cached thumbnail
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_poster_changed
+            AFTER UPDATE OF poster_url ON movies
+            WHEN new.poster_url IS NOT old.poster_url BEGIN
+                UPDATE movies
+                SET poster_path = NULL, poster_width = NULL, poster_height = NULL
+                WHERE id = new.id;
+            END
+            """,
+        ],
+    ),
+    (
+        6,
+        "Change counter and fragment cache for incremental site builds",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS movies_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            """,
+            "INSERT OR IGNORE INTO movies_version (id, version) VALUES (1, 0)",
+            # One cached <li> per movie, dropped when the movie changes;
+            # format is the renderer's FRAGMENT_FORMAT when it was cached
+            """
+            CREATE TABLE IF NOT EXISTS site_fragments (
+                movie_id INTEGER PRIMARY KEY,
+                html TEXT NOT NULL,
+                format TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_version_insert
+            AFTER INSERT ON movies BEGIN
+                UPDATE movies_version SET version = version + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_version_delete
+            AFTER DELETE ON movies BEGIN
+                UPDATE movies_version SET version = version + 1;
+                DELETE FROM site_fragments WHERE movie_id = old.id;
+            END
+            """,
+            # Only columns shown on the site count as a change, and only
+            # when their value actually differs
+            """
+            CREATE TRIGGER IF NOT EXISTS movies_version_update
+            AFTER UPDATE OF title, year, rating, poster_url, poster_path,
+                poster_width, poster_height ON movies
+            WHEN old.title IS NOT new.title
+                OR old.year IS NOT new.year
+                OR old.rating IS NOT new.rating
+                OR old.poster_url IS NOT new.poster_url
+                OR old.poster_path IS NOT new.poster_path
+                OR old.poster_width IS NOT new.poster_width
+                OR old.poster_height IS NOT new.poster_height BEGIN
+                UPDATE movies_version SET version = version + 1;
+                DELETE FROM site_fragments WHERE movie_id = old.id;
+            END
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS site_builds (
+                output_path TEXT PRIMARY KEY,
+                movies_version INTEGER NOT NULL,
+                template_hash TEXT NOT NULL
+            )
+            """,
+        ],
+    ),
+    (
+        7,
+        "Track movies changed since the last search index build",
+        [
+            # One row per changed movie; seq orders the changes so a build
+            # only clears the ones it has seen
+            """
+            CREATE TABLE IF NOT EXISTS search_index_changes (
+                movie_id INTEGER PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_search_index_changes_seq "
+            "ON search_index_changes (seq)",
+            """
+            CREATE TRIGGER IF NOT EXISTS search_index_insert
+            AFTER INSERT ON movies BEGIN
+                INSERT OR REPLACE INTO search_index_changes (movie_id, seq)
+                SELECT new.id, COALESCE(MAX(seq), 0) + 1
+                FROM search_index_changes;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS search_index_delete
+            AFTER DELETE ON movies BEGIN
+                INSERT OR REPLACE INTO search_index_changes (movie_id, seq)
+                SELECT old.id, COALESCE(MAX(seq), 0) + 1
+                FROM search_index_changes;
+            END
+            """,
+            # Only the columns the index holds
+            """
+            CREATE TRIGGER IF NOT EXISTS search_index_update
+            AFTER UPDATE OF title, year, rating ON movies
+            WHEN old.title IS NOT new.title
+                OR old.year IS NOT new.year
+                OR old.rating IS NOT new.rating BEGIN
+                INSERT OR REPLACE INTO search_index_changes (movie_id, seq)
+                SELECT new.id, COALESCE(MAX(seq), 0) + 1
+                FROM search_index_changes;
+            END
+            """,
+        ],
+    ),
+]
+
+
+def current_version(conn):
+    """Return the highest applied migration version (0 for a new DB)."""
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+    )
+    return conn.execute(
+        text("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    ).scalar_one()
+
+
+def run_migrations(engine):
+    """
+    Apply all pending migrations in order, one transaction per step.
+
+    Parameters:
+        engine: SQLAlchemy engine of the movies database
+
+    Returns:
+        list: Versions applied by this call
+    """
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    applied = []
+    for step_version, description, statements in MIGRATIONS:
+        if step_version <= version:
+            continue
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(
+                text(
+                    "INSERT INTO schema_version (version, description) "
+                    "VALUES (:version, :description)"
+                ),
+                {"version": step_version, "description": description},
+            )
+        applied.append(step_version)
+
+    return applied
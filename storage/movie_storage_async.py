@@ -0,0 +1,164 @@
+"""
+Asyncio counterpart of movie_storage_sql
+
+Every coroutine runs the same SQL as the sync module on a bounded thread
+pool, so the event loop never blocks on SQLite. Unlike the sync module,
+nothing is printed: results are returned and failures are raised.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from storage import movie_storage_sql as storage
+
+# Upper bound on concurrent database calls from async code
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS,
+                               thread_name_prefix="movie-storage")
+
+
+class MovieNotFoundError(LookupError):
+    """Raised when a title is not in the database"""
+
+
+class DuplicateMovieError(ValueError):
+    """Raised when adding a title that is already stored"""
+
+
+async def _run(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, lambda: func(*args, **kwargs))
+
+
+def _add_movie(title, year, rating, poster_url, fetched):
+    storage.flush_writes()
+    try:
+        with storage.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO movies "
+                    "(title, year, rating, poster_url, last_fetched) "
+                    "VALUES (:title, :year, :rating, :poster_url, "
+                    "CASE WHEN :fetched THEN CURRENT_TIMESTAMP END)"
+                ),
+                {"title": title, "year": year, "rating": rating,
+                 "poster_url": poster_url, "fetched": fetched},
+            )
+    except IntegrityError as e:
+        raise DuplicateMovieError(f"Movie '{title}' already exists") from e
+    return {"title": title, "year": year, "rating": rating,
+            "poster_url": poster_url}
+
+
+def _update_movie(title, year, rating):
+    storage.flush_writes()
+    with storage.engine.begin() as conn:
+        result = conn.execute(
+            text("UPDATE movies SET year = :year, rating = :rating"
+                 " WHERE (title = :title)"),
+            {"title": title, "year": year, "rating": rating},
+        )
+    if result.rowcount == 0:
+        raise MovieNotFoundError(f"Movie '{title}' not found")
+    return {"title": title, "year": year, "rating": rating}
+
+
+def _delete_movie(title):
+    storage.flush_writes()
+    with storage.engine.begin() as conn:
+        result = conn.execute(
+            text("DELETE FROM movies WHERE title = :title"), {"title": title}
+        )
+    if result.rowcount == 0:
+        raise MovieNotFoundError(f"Movie '{title}' not found")
+    return title
+
+
+async def list_movies(batch_size=500, order_by="id", descending=False):
+    """
+    Retrieve all movies from the database.
+
+    Returns:
+        list: Movie dicts in the requested order
+    """
+    return await _run(
+        lambda: list(storage.iter_movies(batch_size, order_by, descending))
+    )
+
+
+async def add_movie(title, year, rating, poster_url="", fetched=False):
+    """
+    Add a new movie to the database.
+
+    Parameters:
+        fetched (bool): The data comes from OMDb, see storage.add_movie
+
+    Returns:
+        dict: The stored movie
+
+    Raises:
+        DuplicateMovieError: If the title is already stored
+    """
+    return await _run(_add_movie, title, year, rating, poster_url, fetched)
+
+
+async def update_movie(title, year, rating):
+    """
+    Update a movie's year and rating in the database.
+
+    Returns:
+        dict: The new title, year and rating
+
+    Raises:
+        MovieNotFoundError: If no movie has this exact title
+    """
+    return await _run(_update_movie, title, year, rating)
+
+
+async def delete_movie(title):
+    """
+    Delete a movie from the database.
+
+    Returns:
+        str: The deleted title
+
+    Raises:
+        MovieNotFoundError: If no movie has this exact title
+    """
+    return await _run(_delete_movie, title)
+
+
+async def search_movies(query, limit=20):
+    """Full-text search over titles, see storage.search_movies"""
+    return await _run(storage.search_movies, query, limit)
+
+
+if __name__ == "__main__":
+    import time
+
+    async def benchmark(count):
+        """Time `count` searches one by one, then issued at once"""
+        # Start every pool thread and warm SQLite's page cache first, so
+        # neither run pays for it
+        await asyncio.gather(*(search_movies("the") for _ in range(MAX_WORKERS)))
+
+        start = time.perf_counter()
+        for _ in range(count):
+            await search_movies("the")
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(search_movies("the") for _ in range(count))
+        )
+        return sequential, time.perf_counter() - start, len(results)
+
+    storage.init_db()
+    sequential, elapsed, finished = asyncio.run(benchmark(500))
+    print(f"{finished} searches one by one: {sequential * 1000:.1f} ms")
+    print(
+        f"{finished} concurrent searches: {elapsed * 1000:.1f} ms "
+        f"({elapsed / sequential:.2f}x of running them one by one)"
+    )
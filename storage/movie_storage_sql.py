@@ -1,43 +1,267 @@
-from sqlalchemy import create_engine, text
-
-# Define the database URL
 import os
-project_root = os.path.dirname(os.path.abspath(__file__))  # storage directory
-project_root = os.path.dirname(project_root)  # go up to project root
-DB_URL = f"sqlite:///{os.path.join(project_root, 'data', 'movies.db')}"
+import re
+from itertools import islice
+from sqlalchemy import text, bindparam
+from storage.database import DB_PATH, DB_URL, get_engine
+from storage.migrations import run_migrations
+from storage.write_behind import WriteBehindQueue
+from movie_validators import MIN_YEAR, MAX_YEAR
 
-# Create the engine
-engine = create_engine(DB_URL, echo=True)
+# Shared, pragma-tuned engine (see storage/database.py)
+engine = get_engine()
 
+# Set by enable_write_behind(); None means every write commits at once
+write_queue = None
 
-def list_movies():
-    """Retrieve all movies from the database."""
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT title, year, rating, poster_url FROM movies")
+
+def init_db():
+    """Create the schema and apply any pending migrations."""
+    return run_migrations(engine)
+
+
+def enable_write_behind(max_pending=500, flush_interval=2.0):
+    """
+    Queue add/update/delete calls and commit them in batches.
+
+    Parameters:
+        max_pending (int): Flush once this many titles have pending writes
+        flush_interval (float): Flush at least every this many seconds
+    """
+    global write_queue
+    if write_queue is None:
+        write_queue = WriteBehindQueue(engine, max_pending, flush_interval)
+    return write_queue
+
+
+def flush_writes():
+    """
+    Commit any queued writes.
+
+    Returns:
+        dict: "committed", "coalesced", "skipped" and "failed" counts,
+            or None when write-behind mode is off
+    """
+    if write_queue is None:
+        return None
+    try:
+        return write_queue.flush()
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def take_write_messages():
+    """
+    Collect what background write-behind flushes reported.
+
+    Returns:
+        list: Report lines not shown yet; empty when write-behind mode
+            is off
+    """
+    if write_queue is None:
+        return []
+    return write_queue.take_messages()
+
+
+def close_write_behind():
+    """
+    Flush the queued writes and leave write-behind mode.
+
+    Returns:
+        list: Writes that could not be saved during the session, each a
+            dict with "op", "title" and "error"; empty when write-behind
+            mode is off
+    """
+    global write_queue
+    if write_queue is None:
+        return []
+    queue, write_queue = write_queue, None
+    for message in queue.take_messages():
+        print(message)
+    try:
+        queue.close()
+    except Exception as e:
+        print(f"Error: {e}")
+    return queue.failed
+
+
+# Columns iter_movies can order by; id breaks ties for keyset paging
+SORTABLE_COLUMNS = ("id", "title", "year", "rating")
+
+
+def iter_movies(batch_size=500, order_by="id", descending=False, after=None):
+    """
+    Stream movies from the database using keyset pagination.
+
+    Each batch is a separate ``LIMIT`` query that continues after the
+    last row of the previous batch, so only ``batch_size`` rows are held
+    in memory at a time and deep pages cost the same as the first one.
+
+    Parameters:
+        batch_size (int): Rows fetched per query
+        order_by (str): One of SORTABLE_COLUMNS
+        descending (bool): Sort from highest to lowest
+        after (dict): A movie previously yielded by iter_movies; the
+            stream resumes right after it
+
+    Yields:
+        dict: id, title, year, rating and poster_url of each movie
+    """
+    if order_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"order_by must be one of {SORTABLE_COLUMNS}")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    direction = "DESC" if descending else "ASC"
+    comparison = "<" if descending else ">"
+    if order_by == "id":
+        order_clause = f"id {direction}"
+        keyset_clause = f"id {comparison} :after_id"
+    else:
+        order_clause = f"{order_by} {direction}, id {direction}"
+        # A row value lets SQLite seek straight to the position in the
+        # (column, id) index instead of scanning it from the start
+        keyset_clause = (
+            f"({order_by}, id) {comparison} (:after_value, :after_id)"
         )
-        movies = result.fetchall()
 
+    flush_writes()
+    last = after
+    while True:
+        params = {"limit": batch_size}
+        where = ""
+        if last is not None:
+            where = f"WHERE {keyset_clause} "
+            params["after_id"] = last["id"]
+            params["after_value"] = last[order_by]
+
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT id, title, year, rating, poster_url FROM movies "
+                    f"{where}ORDER BY {order_clause} LIMIT :limit"
+                ),
+                params,
+            ).fetchall()
+
+        for row in rows:
+            last = {
+                "id": row[0],
+                "title": row[1],
+                "year": row[2],
+                "rating": row[3],
+                "poster_url": row[4],
+            }
+            yield last
+
+        if len(rows) < batch_size:
+            return
+
+
+def count_movies():
+    """Return the number of movies in the database."""
+    flush_writes()
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM movies")).scalar_one()
+
+
+def build_fts_query(search_term):
+    """
+    Turn free text into an FTS5 query where every word must match.
+
+    Each word is quoted (so FTS operators typed by the user are taken
+    literally) and the last one is a prefix match, so partially typed
+    titles still find results.
+
+    Returns:
+        str: The MATCH expression, or "" if the text has no words
+    """
+    words = re.findall(r"\w+", search_term.lower())
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_movies(query, limit=20):
+    """
+    Full-text search over titles, best matches first.
+
+    Parameters:
+        query (str): Words or word prefixes to look for
+        limit (int): Maximum number of results
+
+    Returns:
+        list: Movie dicts (id, title, year, rating, poster_url) ranked
+            by bm25
+    """
+    match = build_fts_query(query)
+    if not match:
+        return []
+
+    flush_writes()
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT m.id, m.title, m.year, m.rating, m.poster_url "
+                "FROM movies_fts JOIN movies AS m ON m.id = movies_fts.rowid "
+                "WHERE movies_fts MATCH :match "
+                "ORDER BY bm25(movies_fts), m.title LIMIT :limit"
+            ),
+            {"match": match, "limit": limit},
+        ).fetchall()
+
+    return [
+        {
+            "id": row[0],
+            "title": row[1],
+            "year": row[2],
+            "rating": row[3],
+            "poster_url": row[4],
+        }
+        for row in rows
+    ]
+
+
+def list_movies():
+    """Retrieve all movies from the database."""
     return {
-        row[0]: {"year": row[1], "rating": row[2], "poster_url": row[3]}
-        for row in movies
+        movie["title"]: {
+            "year": movie["year"],
+            "rating": movie["rating"],
+            "poster_url": movie["poster_url"],
+        }
+        for movie in iter_movies()
     }
 
 
-def add_movie(title, year, rating, poster_url):
-    """Add a new movie to the database."""
+def add_movie(title, year, rating, poster_url, fetched=False):
+    """
+    Add a new movie to the database.
+
+    Parameters:
+        fetched (bool): The data comes from OMDb, so last_fetched is set
+            to now and the refresh job knows how fresh it is
+    """
+    if write_queue is not None:
+        write_queue.add(title, year, rating, poster_url, fetched)
+        return
     with engine.connect() as conn:
         try:
             conn.execute(
                 text(
-                    "INSERT INTO movies (title, year, rating, poster_url) "
-                    "VALUES (:title, :year, :rating, :poster_url)"
+                    "INSERT INTO movies "
+                    "(title, year, rating, poster_url, last_fetched) "
+                    "VALUES (:title, :year, :rating, :poster_url, "
+                    "CASE WHEN :fetched THEN CURRENT_TIMESTAMP END)"
                 ),
                 {
                     "title": title,
                     "year": year,
                     "rating": rating,
                     "poster_url": poster_url,
+                    "fetched": fetched,
                 },
             )
             conn.commit()
@@ -46,8 +270,174 @@ def add_movie(title, year, rating, poster_url):
             print(f"Error: {e}")
 
 
+def _normalize_bulk_row(row):
+    """
+    Turn a dict or (title, year, rating[, poster_url]) row into params.
+
+    A ValueError passed in place of a row (a line the reader could not
+    parse) is raised, so it becomes that row's error outcome.
+
+    Raises:
+        TypeError, ValueError: If the row is malformed or its year or
+            rating is out of the range the menu accepts
+    """
+    if isinstance(row, ValueError):
+        raise row
+    if isinstance(row, dict):
+        title = row.get("title")
+        year = row.get("year")
+        rating = row.get("rating")
+        poster_url = row.get("poster_url") or ""
+    else:
+        title, year, rating, *rest = row
+        poster_url = rest[0] if rest and rest[0] else ""
+
+    title = str(title or "").strip()
+    if not title:
+        raise ValueError("title is missing")
+
+    year = int(year)
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError(f"year {year} is not between {MIN_YEAR} and {MAX_YEAR}")
+    rating = float(rating)
+    if not 0 <= rating <= 10:
+        raise ValueError(f"rating {rating} is not between 0 and 10")
+
+    return {
+        "title": title,
+        "year": year,
+        "rating": rating,
+        "poster_url": str(poster_url),
+    }
+
+
+def add_movies_bulk(movies, on_duplicate="skip", chunk_size=1000,
+                    fetched=False):
+    """
+    Add many movies to the database, one transaction per chunk.
+
+    Rows are streamed from ``movies`` in chunks of ``chunk_size`` and
+    written with a single ``executemany`` per statement, so the input
+    never has to be held in memory as a whole.
+
+    Parameters:
+        movies (iterable): dicts with title/year/rating/poster_url keys
+            or (title, year, rating[, poster_url]) tuples
+        on_duplicate (str): "skip" keeps the stored row, "upsert"
+            overwrites its year, rating and poster_url
+        chunk_size (int): Number of rows written per transaction
+        fetched (bool): The rows come from OMDb, so last_fetched of every
+            added or updated movie is set to now
+
+    Returns:
+        list: One dict per input row with "title", "status"
+            ("added", "updated", "skipped" or "error") and "error"
+    """
+    if on_duplicate not in ("skip", "upsert"):
+        raise ValueError("on_duplicate must be 'skip' or 'upsert'")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    outcomes = []
+    rows = iter(movies)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        chunk_outcomes = []
+        params_by_title = {}
+        for row in chunk:
+            try:
+                params = {**_normalize_bulk_row(row), "fetched": fetched}
+            except (TypeError, ValueError) as e:
+                raw_title = row.get("title") if isinstance(row, dict) else None
+                chunk_outcomes.append({"title": raw_title or None,
+                                       "status": "error", "error": str(e)})
+                continue
+
+            title = params["title"]
+            if title in params_by_title:
+                # Same title twice in one chunk: the later row wins on
+                # upsert, otherwise it is skipped like any duplicate.
+                if on_duplicate == "upsert":
+                    params_by_title[title] = params
+                    status = "updated"
+                else:
+                    status = "skipped"
+                chunk_outcomes.append({"title": title, "status": status,
+                                       "error": None})
+                continue
+
+            params_by_title[title] = params
+            chunk_outcomes.append({"title": title, "status": None,
+                                   "error": None})
+
+        try:
+            with engine.begin() as conn:
+                existing = set()
+                if params_by_title:
+                    existing = {
+                        row[0]
+                        for row in conn.execute(
+                            text(
+                                "SELECT title FROM movies "
+                                "WHERE title IN :titles"
+                            ).bindparams(bindparam("titles", expanding=True)),
+                            {"titles": list(params_by_title)},
+                        )
+                    }
+
+                new_rows = [params for title, params in params_by_title.items()
+                            if title not in existing]
+                if new_rows:
+                    conn.execute(
+                        text(
+                            "INSERT INTO movies "
+                            "(title, year, rating, poster_url, last_fetched) "
+                            "VALUES (:title, :year, :rating, :poster_url, "
+                            "CASE WHEN :fetched THEN CURRENT_TIMESTAMP END)"
+                        ),
+                        new_rows,
+                    )
+
+                if on_duplicate == "upsert" and existing:
+                    conn.execute(
+                        text(
+                            "UPDATE movies SET year = :year, rating = :rating, "
+                            "poster_url = :poster_url, last_fetched = CASE "
+                            "WHEN :fetched THEN CURRENT_TIMESTAMP "
+                            "ELSE last_fetched END WHERE title = :title"
+                        ),
+                        [params_by_title[title] for title in existing],
+                    )
+        except Exception as e:
+            for outcome in chunk_outcomes:
+                if outcome["status"] != "error":
+                    outcome["status"] = "error"
+                    outcome["error"] = str(e)
+            outcomes.extend(chunk_outcomes)
+            continue
+
+        for outcome in chunk_outcomes:
+            if outcome["status"] is None:
+                if outcome["title"] in existing:
+                    outcome["status"] = (
+                        "updated" if on_duplicate == "upsert" else "skipped"
+                    )
+                else:
+                    outcome["status"] = "added"
+        outcomes.extend(chunk_outcomes)
+
+    return outcomes
+
+
 def delete_movie(title):
     """Delete a movie from the database."""
+    if write_queue is not None:
+        write_queue.delete(title)
+        return
     with engine.connect() as conn:
         try:
             conn.execute(
@@ -61,6 +451,9 @@ def delete_movie(title):
 
 def update_movie(title, year, rating):
     """Update a movie's rating in the database."""
+    if write_queue is not None:
+        write_queue.update(title, year, rating)
+        return
     with engine.connect() as conn:
         try:
             conn.execute(
@@ -79,25 +472,11 @@ def update_movie(title, year, rating):
 if __name__ == "__main__":
     # Debug: Print the actual database path being used
     print(f"Database URL: {DB_URL}")
-    db_file_path = os.path.join(project_root, 'data', 'movies.db')
-    print(f"Database file path: {db_file_path}")
-    print(f"File exists: {os.path.exists(db_file_path)}")
-    print(f"File readable: {os.access(db_file_path, os.R_OK)}")
-    print(f"File writable: {os.access(db_file_path, os.W_OK)}")
-
-    # Create the movies table if it does not exist
-    with engine.connect() as connection:
-        connection.execute(
-            text(
-                """
-            CREATE TABLE IF NOT EXISTS movies (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT UNIQUE NOT NULL,
-                year INTEGER NOT NULL,
-                rating REAL NOT NULL,
-                poster_url TEXT NOT NULL
-            )
-        """
-            )
-        )
-        connection.commit()
\ No newline at end of file
+    print(f"Database file path: {DB_PATH}")
+    print(f"File exists: {os.path.exists(DB_PATH)}")
+    print(f"File readable: {os.access(DB_PATH, os.R_OK)}")
+    print(f"File writable: {os.access(DB_PATH, os.W_OK)}")
+
+    # Create the schema and apply pending migrations
+    applied = init_db()
+    print(f"Applied migrations: {applied or 'none'}")
@@ -0,0 +1,223 @@
+"""
+Write-behind queue for movie mutations
+
+Instead of one connection and one commit per add/update/delete, the
+queue keeps at most one pending write per title and flushes them all in
+a single transaction once max_pending titles are waiting, once
+flush_interval seconds have passed, or when flush() is called. A write
+that cannot be committed is dropped and reported instead of being
+retried on every flush. Flushes made by the timer thread keep their
+report in a list for the caller to show, since printing from the thread
+would land in the middle of whatever the user is typing.
+"""
+
+import threading
+from sqlalchemy import text
+
+
+class WriteBehindQueue:
+    """Coalescing queue of pending movie writes keyed by title"""
+
+    def __init__(self, engine, max_pending=500, flush_interval=2.0):
+        self.engine = engine
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._coalesced = 0
+        # Writes dropped after failing on their own, with their "error"
+        self.failed = []
+        # Report lines of timer flushes not yet shown (see take_messages)
+        self._messages = []
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._timer.start()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, title, year, rating, poster_url, fetched=False):
+        """Queue an insert; fetched marks OMDb data, stamping last_fetched"""
+        self._enqueue(
+            title,
+            {"op": "add", "year": year, "rating": rating,
+             "poster_url": poster_url, "fetched": fetched},
+        )
+
+    def update(self, title, year, rating):
+        """Queue a year/rating update"""
+        self._enqueue(title, {"op": "update", "year": year, "rating": rating})
+
+    def delete(self, title):
+        """Queue a delete"""
+        self._enqueue(title, {"op": "delete"})
+
+    def _enqueue(self, title, write):
+        with self._lock:
+            previous = self._pending.get(title)
+            if previous is not None:
+                self._coalesced += 1
+                write = self._merge(previous, write)
+            self._pending[title] = write
+            should_flush = len(self._pending) >= self.max_pending
+
+        if should_flush:
+            self.flush()
+
+    @staticmethod
+    def _merge(previous, write):
+        """Collapse two writes to the same title into one"""
+        if write["op"] == "delete":
+            return write
+        if write["op"] == "update":
+            if previous["op"] == "delete":
+                # Updating a row that is about to be deleted is a no-op
+                return previous
+            return {**previous, "year": write["year"], "rating": write["rating"]}
+        if previous["op"] == "update":
+            # The row already exists, so the insert would be rejected
+            return previous
+        if previous["op"] in ("delete", "upsert"):
+            # add after delete replaces the stored row
+            return {**write, "op": "upsert"}
+        return write
+
+    @staticmethod
+    def _execute(conn, writes):
+        """
+        Run a list of writes on an open transaction.
+
+        Returns:
+            int: Adds skipped because the title was already stored
+        """
+        by_op = {"add": [], "upsert": [], "update": [], "delete": []}
+        for write in writes:
+            by_op[write["op"]].append(write)
+
+        if by_op["delete"]:
+            conn.execute(
+                text("DELETE FROM movies WHERE title = :title"),
+                by_op["delete"],
+            )
+        skipped = 0
+        if by_op["add"]:
+            result = conn.execute(
+                text(
+                    "INSERT INTO movies "
+                    "(title, year, rating, poster_url, last_fetched) "
+                    "VALUES (:title, :year, :rating, :poster_url, "
+                    "CASE WHEN :fetched THEN CURRENT_TIMESTAMP END) "
+                    "ON CONFLICT (title) DO NOTHING"
+                ),
+                by_op["add"],
+            )
+            skipped = len(by_op["add"]) - result.rowcount
+        if by_op["upsert"]:
+            conn.execute(
+                text(
+                    "INSERT INTO movies "
+                    "(title, year, rating, poster_url, last_fetched) "
+                    "VALUES (:title, :year, :rating, :poster_url, "
+                    "CASE WHEN :fetched THEN CURRENT_TIMESTAMP END) "
+                    "ON CONFLICT (title) DO UPDATE SET "
+                    "year = excluded.year, rating = excluded.rating, "
+                    "poster_url = excluded.poster_url, "
+                    "last_fetched = excluded.last_fetched"
+                ),
+                by_op["upsert"],
+            )
+        if by_op["update"]:
+            conn.execute(
+                text(
+                    "UPDATE movies SET year = :year, rating = :rating "
+                    "WHERE title = :title"
+                ),
+                by_op["update"],
+            )
+        return skipped
+
+    def flush(self, deferred=False):
+        """
+        Commit every pending write in one transaction.
+
+        If that transaction fails, the writes are retried one per
+        transaction, so a single bad write cannot hold back the others.
+        Writes that still fail are dropped from the queue (retrying them
+        would fail again forever), reported and kept in `failed`. Adds of
+        a title that is already stored change nothing and are reported
+        as skipped.
+
+        Parameters:
+            deferred (bool): Keep the report for take_messages() instead
+                of printing it
+
+        Returns:
+            dict: "committed" writes, how many were "coalesced" away,
+                "skipped" as duplicates and how many "failed"
+        """
+        with self._lock:
+            if not self._pending:
+                return {"committed": 0, "coalesced": 0, "skipped": 0,
+                        "failed": 0}
+
+            writes = [{**write, "title": title}
+                      for title, write in self._pending.items()]
+            coalesced = self._coalesced
+            self._pending = {}
+            self._coalesced = 0
+
+            failed = []
+            try:
+                with self.engine.begin() as conn:
+                    skipped = self._execute(conn, writes)
+            except Exception:
+                skipped = 0
+                for write in writes:
+                    try:
+                        with self.engine.begin() as conn:
+                            skipped += self._execute(conn, [write])
+                    except Exception as e:
+                        failed.append({**write, "error": str(getattr(e, "orig", e))})
+            self.failed.extend(failed)
+
+        report = {"committed": len(writes) - len(failed) - skipped,
+                  "coalesced": coalesced, "skipped": skipped,
+                  "failed": len(failed)}
+        lines = [
+            f"Flushed {report['committed']} writes "
+            f"({report['coalesced']} coalesced)."
+        ]
+        if skipped:
+            lines.append(f"Skipped {skipped} adds of movies already saved.")
+        lines += [f"Error: {write['op']} of '{write['title']}' not saved: "
+                  f"{write['error']}" for write in failed]
+        self._report(lines, deferred)
+        return report
+
+    def _report(self, lines, deferred):
+        if deferred:
+            with self._lock:
+                self._messages.extend(lines)
+        else:
+            for line in lines:
+                print(line)
+
+    def take_messages(self):
+        """Return the reports of timer flushes since the last call"""
+        with self._lock:
+            messages, self._messages = self._messages, []
+        return messages
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush(deferred=True)
+            except Exception as e:
+                self._report([f"Error: {e}"], True)
+
+    def close(self):
+        """Stop the timer thread and flush what is left"""
+        self._stopped.set()
+        self._timer.join()
+        return self.flush()
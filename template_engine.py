@@ -0,0 +1,100 @@
+"""
+Precompiled HTML templates
+
+A template is parsed once into static text segments and named slots
+(__TEMPLATE_NAME__ placeholders) and cached until the file's
+modification time changes. Rendering is a generator of chunks, so a slot
+can be filled from a stream, such as the movie grid read from the
+database, without ever building the page as one string.
+
+Plain string values are HTML-escaped. Values wrapped in Markup, and
+iterables of chunks, are trusted HTML and written as they are.
+"""
+
+import html
+import os
+import re
+import threading
+
+PLACEHOLDER_PATTERN = re.compile(r"__TEMPLATE_([A-Z0-9]+(?:_[A-Z0-9]+)*)__")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class Markup(str):
+    """A string of trusted HTML, written without escaping"""
+
+
+class Template:
+    """A template split into static text and slots"""
+
+    def __init__(self, source, path=None):
+        self.source = source
+        self.path = path
+        # Even positions hold text, odd positions slot names
+        self.segments = PLACEHOLDER_PATTERN.split(source)
+        self.slots = {name.lower() for name in self.segments[1::2]}
+
+    def render(self, **values):
+        """
+        Render the template.
+
+        Parameters:
+            **values: One value per slot, keyed by the lowercase
+                placeholder name (__TEMPLATE_MOVIE_GRID__ is movie_grid).
+                A slot may appear several times; an iterable value is
+                only consumed once, so use those for single slots.
+
+        Returns:
+            generator: Chunks of the rendered page
+
+        Raises:
+            KeyError: If a slot has no value
+        """
+        missing = self.slots - values.keys()
+        if missing:
+            raise KeyError(
+                f"No value for template slots: {', '.join(sorted(missing))}"
+            )
+        return self._render(values)
+
+    def _render(self, values):
+        for index, segment in enumerate(self.segments):
+            if not index % 2:
+                if segment:
+                    yield segment
+                continue
+            value = values[segment.lower()]
+            if isinstance(value, Markup):
+                yield value
+            elif isinstance(value, (str, int, float)):
+                yield html.escape(str(value))
+            else:
+                yield from value
+
+
+def load_template(template_path):
+    """
+    Return the compiled template of a file, parsing it only when the file
+    changed since the last call.
+
+    Parameters:
+        template_path (str): Path to the template file
+
+    Returns:
+        Template: The compiled template
+    """
+    key = os.path.abspath(template_path)
+    mtime = os.stat(key).st_mtime_ns
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    with open(key, "r", encoding="utf-8") as fileobject:
+        template = Template(fileobject.read(), template_path)
+
+    with _cache_lock:
+        _cache[key] = (mtime, template)
+    return template
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import event, text
+
+from storage import movie_storage_async as async_storage
+from storage import movie_storage_sql as storage
+from storage.database import get_engine
+from storage.migrations import run_migrations
+
+SEEDED_MOVIES = 20000
+
+
+@pytest.fixture
+def movies_engine(tmp_path, monkeypatch):
+    engine = get_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    run_migrations(engine)
+    monkeypatch.setattr(storage, "engine", engine)
+    monkeypatch.setattr(storage, "write_queue", None)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def seeded_engine(movies_engine):
+    with movies_engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO movies (title, year, rating, poster_url) "
+                 "VALUES (:title, :year, :rating, '')"),
+            [{"title": f"Movie night {i}", "year": 1900 + i % 125,
+              "rating": i % 100 / 10} for i in range(SEEDED_MOVIES)],
+        )
+    return movies_engine
+
+
+def _track_statements(engine):
+    """Count SQL statements running at the same time on the engine"""
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def before(*args):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+
+    def after(*args):
+        with lock:
+            state["running"] -= 1
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    return state
+
+
+def test_concurrent_reads_overlap(seeded_engine):
+    # Every match is ranked by bm25 before LIMIT applies, so each search
+    # spends its time inside SQLite
+    queries = [f"movie night {19000 + i}" if i % 4 else "movie"
+               for i in range(24)]
+
+    async def run():
+        # Warm the pool threads, their connections and SQLite's cache
+        await asyncio.gather(*(async_storage.search_movies("movie")
+                               for _ in range(async_storage.MAX_WORKERS)))
+
+        start = time.perf_counter()
+        sequential = [await async_storage.search_movies(query)
+                      for query in queries]
+        sequential_time = time.perf_counter() - start
+
+        state = _track_statements(seeded_engine)
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticks = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        concurrent, movies = await asyncio.gather(
+            asyncio.gather(*(async_storage.search_movies(query)
+                             for query in queries)),
+            async_storage.list_movies(order_by="rating", descending=True),
+        )
+        concurrent_time = time.perf_counter() - start
+        ticks.cancel()
+        return (sequential, concurrent, movies, state, max(gaps),
+                sequential_time, concurrent_time)
+
+    (sequential, concurrent, movies, state, max_gap,
+     sequential_time, concurrent_time) = asyncio.run(run())
+
+    assert concurrent == sequential
+    assert len(concurrent[0]) == 20
+    assert [movie["title"] for movie in concurrent[1]] == ["Movie night 19001"]
+    assert len(movies) == SEEDED_MOVIES
+    assert movies[0]["rating"] == 9.9 and movies[-1]["rating"] == 0
+    # The reads really ran side by side on the shared engine
+    assert state["peak"] > 1
+    # The event loop kept running while SQLite worked on the pool threads
+    assert max_gap < concurrent_time / 4
+    assert concurrent_time < sequential_time * 2
+
+
+def test_add_movie_stamps_last_fetched(movies_engine):
+    async def run():
+        await async_storage.add_movie("Alien", 1979, 8.5, "http://p",
+                                      fetched=True)
+        await async_storage.add_movie("Home Video", 2001, 6.0)
+
+    asyncio.run(run())
+
+    with movies_engine.connect() as conn:
+        fetched = dict(conn.execute(
+            text("SELECT title, last_fetched IS NOT NULL FROM movies")
+        ).fetchall())
+    assert fetched == {"Alien": 1, "Home Video": 0}
+
+
+def test_writes_round_trip(movies_engine):
+    async def run():
+        await async_storage.add_movie("Alien", 1979, 8.5)
+        with pytest.raises(async_storage.DuplicateMovieError):
+            await async_storage.add_movie("Alien", 1979, 8.5)
+        await async_storage.update_movie("Alien", 1979, 8.6)
+        with pytest.raises(async_storage.MovieNotFoundError):
+            await async_storage.update_movie("Aliens", 1986, 8.4)
+        movies = await async_storage.list_movies()
+        await async_storage.delete_movie("Alien")
+        with pytest.raises(async_storage.MovieNotFoundError):
+            await async_storage.delete_movie("Alien")
+        return movies, await async_storage.list_movies()
+
+    before, after = asyncio.run(run())
+
+    assert [(movie["title"], movie["rating"]) for movie in before] == [
+        ("Alien", 8.6)
+    ]
+    assert after == []
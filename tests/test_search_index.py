@@ -0,0 +1,51 @@
+import json
+import os
+
+from sqlalchemy import text
+
+import search_index
+from storage.database import get_engine
+from storage.migrations import run_migrations
+
+
+def _load_index(index_dir):
+    files = {}
+    for name in sorted(os.listdir(index_dir)):
+        with open(os.path.join(index_dir, name), encoding="utf-8") as fileobject:
+            files[name] = json.load(fileobject)
+    return files
+
+
+def test_incremental_update_matches_full_build(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO movies (title, year, rating, poster_url) "
+                 "VALUES (:title, :year, :rating, '')"),
+            [{"title": f"Movie {word} {i}", "year": 1950 + i, "rating": i % 10}
+             for i, word in enumerate(["alpha", "beta", "gamma"] * 20)],
+        )
+    index_dir = str(tmp_path / "search")
+    search_index.build_search_index(engine, index_dir)
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE movies SET title = 'Zulu Night' WHERE id = 3"))
+        conn.execute(text("UPDATE movies SET rating = 9.5 WHERE id = 4"))
+        conn.execute(text("DELETE FROM movies WHERE id = 5"))
+        conn.execute(text("INSERT INTO movies (title, year, rating, poster_url) "
+                          "VALUES ('Quiet Zulu', 2001, 7.0, '')"))
+    stats = search_index.build_search_index(engine, index_dir)
+
+    full_dir = str(tmp_path / "full")
+    search_index.build_search_index(engine, full_dir, full=True)
+    engine.dispose()
+
+    assert _load_index(index_dir) == _load_index(full_dir)
+    assert stats["written"] < stats["files"]
+    titles = [movie["title"] for movie in search_index.search("zul", index_dir)]
+    assert titles == ["Zulu Night", "Quiet Zulu"]
+    # Movie 3 was renamed and movie 5 deleted
+    ids = {movie["id"] for movie in search_index.search("movie", index_dir,
+                                                        limit=100)}
+    assert ids.isdisjoint({3, 5}) and len(ids) == 58
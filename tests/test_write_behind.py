@@ -0,0 +1,75 @@
+import time
+
+from sqlalchemy import text
+
+from storage.database import get_engine
+from storage.migrations import run_migrations
+from storage.write_behind import WriteBehindQueue
+
+
+def test_failing_write_is_dropped_and_reported(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    run_migrations(engine)
+    queue = WriteBehindQueue(engine, flush_interval=60)
+    try:
+        queue.add("Alien", 1979, 8.5, "")
+        queue.add("Broken", None, 7.0, "")
+
+        report = queue.flush()
+
+        assert report == {"committed": 1, "coalesced": 0, "skipped": 0,
+                          "failed": 1}
+        assert [write["title"] for write in queue.failed] == ["Broken"]
+        assert len(queue) == 0
+        # Nothing left to retry on the next flush
+        assert queue.flush()["failed"] == 0
+        with engine.connect() as conn:
+            titles = conn.execute(text("SELECT title FROM movies")).scalars()
+            assert list(titles) == ["Alien"]
+    finally:
+        queue.close()
+        engine.dispose()
+
+
+def test_duplicate_add_is_reported_as_skipped(tmp_path, capsys):
+    engine = get_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    run_migrations(engine)
+    queue = WriteBehindQueue(engine, flush_interval=60)
+    try:
+        queue.add("Alien", 1979, 8.5, "")
+        queue.flush()
+        queue.add("Alien", 1979, 9.9, "")
+        queue.add("Aliens", 1986, 8.4, "")
+
+        report = queue.flush()
+
+        assert report == {"committed": 1, "coalesced": 0, "skipped": 1,
+                          "failed": 0}
+        assert "Skipped 1 adds" in capsys.readouterr().out
+        with engine.connect() as conn:
+            rating = conn.execute(
+                text("SELECT rating FROM movies WHERE title = 'Alien'")
+            ).scalar_one()
+            assert rating == 8.5
+    finally:
+        queue.close()
+        engine.dispose()
+
+
+def test_timer_flush_report_is_kept_for_later(tmp_path, capsys):
+    engine = get_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    run_migrations(engine)
+    queue = WriteBehindQueue(engine, flush_interval=0.05)
+    try:
+        queue.add("Alien", 1979, 8.5, "")
+        for _ in range(100):
+            if not len(queue):
+                break
+            time.sleep(0.05)
+        queue.close()
+
+        assert capsys.readouterr().out == ""
+        assert queue.take_messages() == ["Flushed 1 writes (0 coalesced)."]
+        assert queue.take_messages() == []
+    finally:
+        engine.dispose()
@@ -0,0 +1,159 @@
+"""
+Fuzzy movie title resolution against locally cached OMDb candidates
+
+Titles returned by OMDb (exact lookups and ?s= search results) are kept
+in the API cache database. A typed title, typos included, is ranked
+against those candidates by edit distance and, when the user gave one,
+by distance to the release year, before any request goes out.
+"""
+
+import re
+from storage import api_cache
+from storage.api_cache import normalize_key
+
+
+def edit_distance(a, b, limit=None):
+    """
+    Edit distance between two strings, counting insertions, deletions,
+    substitutions and swaps of adjacent characters ("Matirx") as one edit.
+
+    Parameters:
+        a (str), b (str): Strings to compare
+        limit (int): Stop early and return limit + 1 once the distance
+            is known to exceed it
+
+    Returns:
+        int: Number of edits turning a into b
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if (i > 1 and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == char_b):
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def split_year(query):
+    """
+    Separate a trailing release year from a typed title.
+
+    "Dune 1984" and "Dune (1984)" both give ("Dune", 1984).
+
+    Returns:
+        tuple: (title, year or None)
+    """
+    match = re.match(r"^(.*?)[\s(]+(\d{4})\)?\s*$", query)
+    if match and match.group(1).strip():
+        return match.group(1).strip(), int(match.group(2))
+    return query.strip(), None
+
+
+def strip_article(title):
+    """Drop a leading "the", "a" or "an" from a normalised title"""
+    return re.sub(r"^(the|a|an) ", "", title)
+
+
+ROMAN_NUMERAL_PATTERN = re.compile(r"^(x{0,3})(ix|iv|v?i{0,3})$")
+
+
+def sequel_tokens(title):
+    """
+    Numbers and roman numerals of a normalised title ("toy story 3",
+    "rocky iv"), which a typo correction must never change.
+
+    Returns:
+        list: The tokens, sorted
+    """
+    return sorted(
+        token for token in title.split()
+        if token.isdigit() or ROMAN_NUMERAL_PATTERN.match(token)
+    )
+
+
+def max_distance_for(title):
+    """Edits tolerated for a title: one per five characters, so short
+    titles like "Dune" must match exactly"""
+    return len(title) // 5
+
+
+def rank_candidates(query, candidates, limit=5):
+    """
+    Rank candidates by closeness to the query.
+
+    The distance is the smaller of the distances with and without a
+    leading article, so "Matrix" matches "The Matrix" and the misspelled
+    "Teh Matrix" still does too. Numbers and roman numerals must match
+    exactly: "Toy Stroy 3" never becomes "Toy Story 2".
+
+    Parameters:
+        query (str): Title as typed, optionally ending with a year
+        candidates (iterable): (normalized_title, year, title) tuples
+        limit (int): Number of results
+
+    Returns:
+        list: (distance, year_difference, title, year) tuples, best
+            first, only including candidates within max_distance_for()
+    """
+    title, year = split_year(query)
+    key = normalize_key(title)
+    stripped_key = strip_article(key)
+    max_distance = max_distance_for(stripped_key)
+    tokens = sequel_tokens(key)
+
+    ranked = []
+    for normalized_title, candidate_year, candidate_title in candidates:
+        if sequel_tokens(normalized_title) != tokens:
+            continue
+        distance = min(
+            edit_distance(key, normalized_title, max_distance),
+            edit_distance(stripped_key, strip_article(normalized_title),
+                          max_distance),
+        )
+        if distance > max_distance:
+            continue
+        year_difference = abs(candidate_year - year) if year else 0
+        ranked.append((distance, year_difference, candidate_title, candidate_year))
+
+    ranked.sort()
+    return ranked[:limit]
+
+
+def resolve_locally(query, exact=False):
+    """
+    Best cached candidate for a typed title, without any network call.
+
+    Parameters:
+        query (str): Title as typed, optionally ending with a year
+        exact (bool): Only accept a candidate whose normalised title is
+            the typed one, no typo correction
+
+    Returns:
+        tuple: (title, year) or None when no candidate is close enough
+    """
+    if exact:
+        # Primary key lookup; only typo correction needs every candidate
+        candidates = api_cache.find_candidates(normalize_key(split_year(query)[0]))
+    else:
+        candidates = api_cache.load_candidates()
+    ranked = rank_candidates(query, candidates, limit=1)
+    if not ranked:
+        return None
+    _, _, title, year = ranked[0]
+    return title, year
@@ -4,31 +4,91 @@ website_generator.py
 Generates an HTML website for movies using data fetched from the sql
 """
 
+import collections
+import hashlib
+import html
+import itertools
+import math
 import os
-from sqlalchemy import create_engine, text
-
-# Define the database URI
-# Use same path logic as storage module
-project_root = os.path.dirname(os.path.abspath(__file__))  # Already in root
-DB_URL = f"sqlite:///{os.path.join(project_root, 'data', 'movies.db')}"
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from colorama import Fore, Style
+from sqlalchemy import text
+import search_index
+from storage import movie_storage_sql as storage
+from storage.database import get_engine
+from template_engine import Markup, load_template
 
 # Movie image placeholder
 IMAGE_PLACEHOLDER = "https://placehold.jp/150x150.png"
 
-# Create Engine
-engine = create_engine(DB_URL, echo=True)
+# Rows fetched from the cursor at a time, and bytes buffered before each
+# write to movies.html
+OUTPUT_BATCH = 500
+OUTPUT_BUFFER_SIZE = 1 << 16
+# Movies per id range handed to a worker process in parallel builds
+RENDER_CHUNK_SIZE = 5000
+# Version of the markup render_movie_item produces; bump it when that
+# changes so cached fragments and finished builds are redone
+FRAGMENT_FORMAT = "2"
+
+# Paged site: default movies per page, the lowest rating of the top
+# rating band, the build time shown on pages and the names of generated
+# page files
+DEFAULT_PAGE_SIZE = 100
+TOP_RATING_BAND = 9
+BUILD_TIME_FORMAT = "%Y-%m-%d %H:%M"
+PAGE_FILE_PATTERN = re.compile(r"^(page|decade-\d+|rating-\d+)-\d+\.html$")
 
+# Shared engine, same pool as the storage module
+engine = get_engine()
 
-# 1. Read the contents of the template, index_template.html
-def read_html_template(template_path):
+
+def render_movie_item(movie):
     """
-    Reads an HTML template from a file.
+    Renders one movie as an HTML list item, skipping any missing fields.
 
-    :param template_path: Path to the HTML template file.
-    :return: Content of the template file as a string.
+    :param movie: Movie data mapping (a dict or a database row).
+    :return: The <li> element as a string.
     """
-    with open(template_path, "r", encoding="utf-8") as fileobject:
-        return fileobject.read()
+    poster_path = "static/placeholder_image.png"
+    size = ""
+    poster = movie.get("poster_url")
+    if movie.get("poster_path") and os.path.exists(movie["poster_path"]):
+        # Local thumbnail from poster_pipeline.py
+        poster = movie["poster_path"]
+        size = (
+            f'width = "{movie["poster_width"]}" '
+            f'height = "{movie["poster_height"]}" '
+        )
+    elif not poster:
+        poster = poster_path
+    elif not poster.startswith(("http://", "https://")) and not os.path.exists(
+        poster
+    ):
+        poster = poster_path
+    title = html.escape(str(movie.get("title", "")))
+    return (
+        f'<li class="movie-item">\n'
+        f'    <img class = "movie-poster" src = "{html.escape(poster or poster_path)}" '
+        f'{size}alt = "{title}">\n'
+        f'    <h3>{title}</h3>\n'
+        f'    <p>{movie.get("year", "")}</p>\n'
+        f'    <p>{movie.get("rating", "")}</p>\n'
+        "</li>\n"
+    )
+
+
+def iter_movie_items(movies_data):
+    """
+    Lazily renders movies into HTML list items, one at a time.
+
+    :param movies_data: Iterable of movie data mappings, e.g. a cursor.
+    :return: Generator of <li> strings.
+    """
+    for movie in movies_data:
+        yield render_movie_item(movie)
 
 
 def serialize_movies_data(movies_data):
@@ -37,71 +97,575 @@ def serialize_movies_data(movies_data):
     skipping any missing fields.
 
     :param movies_data: List of movie data dictionaries.
-
-    :param movies_data:
     :return: A string containing the HTML representation of the movies' data.
     """
-    output = ""
-    for movie in movies_data:
-        output += f'<li class="movie-item">\n'
-        poster_path = "static/placeholder_image.png"
-        poster = movie.get("poster_url")
-        if not poster:
-            poster = poster_path
-        elif not poster.startswith(("http://", "https://")) and not os.path.exists(
-            poster
-        ):
-            poster = poster_path
-        output += (
-            f'    <img class = "movie-poster" src = "{poster or poster_path}" '
-            f'alt = "{movie.get("title", "")}">\n'
+    return "".join(iter_movie_items(movies_data))
+
+
+def iter_unrendered_movies(connection, first_id=None, last_id=None):
+    """
+    Streams the movies that have no current cached fragment, in id order.
+
+    :param connection: Open SQLAlchemy connection.
+    :param first_id: Optional lowest id to include.
+    :param last_id: Optional highest id to include.
+    :return: Iterator of row mappings, fetched as they are consumed.
+    """
+    id_range = ""
+    if first_id is not None:
+        id_range = "AND id BETWEEN :first_id AND :last_id "
+    return (
+        connection.execution_options(stream_results=True, yield_per=OUTPUT_BATCH)
+        .execute(
+            text(
+                "SELECT id, title, year, rating, poster_url, poster_path, "
+                "poster_width, poster_height FROM movies m "
+                "WHERE NOT EXISTS "
+                "(SELECT 1 FROM site_fragments f WHERE f.movie_id = m.id "
+                "AND f.format = :fragment_format) "
+                f"{id_range}ORDER BY id"
+            ),
+            {"first_id": first_id, "last_id": last_id,
+             "fragment_format": FRAGMENT_FORMAT},
+        )
+        .mappings()
+    )
+
+
+def iter_render_ranges(connection, chunk_size):
+    """
+    Splits the movies without a current cached fragment into id ranges.
+
+    :param connection: Open SQLAlchemy connection.
+    :param chunk_size: Movies per range.
+    :return: Iterator of (first_id, last_id) tuples in id order.
+    """
+    ids = iter(
+        connection.execution_options(stream_results=True, yield_per=OUTPUT_BATCH)
+        .execute(
+            text(
+                "SELECT id FROM movies m WHERE NOT EXISTS "
+                "(SELECT 1 FROM site_fragments f WHERE f.movie_id = m.id "
+                "AND f.format = :fragment_format) "
+                "ORDER BY id"
+            ),
+            {"fragment_format": FRAGMENT_FORMAT},
+        )
+        .scalars()
+    )
+    while True:
+        chunk = list(itertools.islice(ids, chunk_size))
+        if not chunk:
+            return
+        yield chunk[0], chunk[-1]
+
+
+def _init_render_worker():
+    """Drops the database connections a forked worker inherited."""
+    engine.dispose(close=False)
+
+
+def _render_range(db_url, first_id, last_id):
+    """Renders one id range in a worker process; returns its fragments."""
+    with get_engine(db_url).connect() as connection:
+        return [
+            (movie["id"], render_movie_item(movie))
+            for movie in iter_unrendered_movies(connection, first_id, last_id)
+        ]
+
+
+def render_missing_fragments(workers=1):
+    """
+    Renders every movie without a cached fragment into site_fragments.
+
+    Fragments are dropped by triggers whenever a displayed column of a
+    movie changes, so after an edit only that movie is rendered again.
+
+    With more than one worker, the movies are split into id ranges of
+    RENDER_CHUNK_SIZE that worker processes read from SQLite and render,
+    while this process stores the results in id order. At most two
+    ranges per worker are in flight, so memory use stays bounded.
+
+    :param workers: Number of rendering processes.
+    :return: Number of fragments rendered.
+    """
+    rendered = 0
+    if workers <= 1:
+        with engine.connect() as connection:
+            batch = []
+            for movie in iter_unrendered_movies(connection):
+                batch.append((movie["id"], render_movie_item(movie)))
+                if len(batch) >= OUTPUT_BATCH:
+                    save_fragments(batch)
+                    rendered += len(batch)
+                    batch = []
+            save_fragments(batch)
+            rendered += len(batch)
+        return rendered
+
+    db_url = engine.url.render_as_string(hide_password=False)
+    pending = collections.deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_render_worker
+    ) as executor, engine.connect() as connection:
+        for first_id, last_id in iter_render_ranges(connection, RENDER_CHUNK_SIZE):
+            pending.append(
+                executor.submit(_render_range, db_url, first_id, last_id)
+            )
+            if len(pending) >= workers * 2:
+                fragments = pending.popleft().result()
+                save_fragments(fragments)
+                rendered += len(fragments)
+        while pending:
+            fragments = pending.popleft().result()
+            save_fragments(fragments)
+            rendered += len(fragments)
+    return rendered
+
+
+def save_fragments(fragments):
+    """
+    Stores rendered fragments in the fragment cache, tagged with
+    FRAGMENT_FORMAT.
+
+    :param fragments: List of (movie_id, html) tuples. They go straight
+    to the driver, skipping SQLAlchemy's per-row parameter processing,
+    which would otherwise cost as much as rendering them.
+    """
+    if not fragments:
+        return
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT OR REPLACE INTO site_fragments (movie_id, html, format) "
+            "VALUES (?, ?, ?)",
+            [(movie_id, item, FRAGMENT_FORMAT) for movie_id, item in fragments],
+        )
+
+
+def iter_cached_fragments(connection, where="1", params=None, order_by="m.id"):
+    """
+    Streams cached list items of the matching movies in the given order.
+
+    :param connection: Open SQLAlchemy connection.
+    :param where: SQL condition on the movies table, aliased m.
+    :param params: Bind parameters of the condition.
+    :param order_by: SQL ORDER BY clause.
+    :return: Iterator of <li> strings, fetched as they are consumed.
+    """
+    return (
+        connection.execution_options(stream_results=True, yield_per=OUTPUT_BATCH)
+        .execute(
+            text(
+                "SELECT f.html FROM movies m "
+                "JOIN site_fragments f ON f.movie_id = m.id "
+                "AND f.format = :fragment_format "
+                f"WHERE {where} ORDER BY {order_by}"
+            ),
+            {**(params or {}), "fragment_format": FRAGMENT_FORMAT},
+        )
+        .scalars()
+    )
+
+
+def iter_cached_movie_items():
+    """
+    Streams the cached list items of all movies in id order.
+
+    :return: Generator of <li> strings, joined in batches.
+    """
+    with engine.connect() as connection:
+        for partition in iter_cached_fragments(connection).partitions():
+            yield "".join(partition)
+
+
+def start_build(build_key, template_html, force):
+    """
+    Checks whether a build is needed and returns what to record after it.
+
+    :param build_key: Output file or directory the build writes.
+    :param template_html: Everything the output depends on besides the
+    movies, e.g. template contents and options.
+    :param force: Drop every cached fragment and always build.
+    :return: (needed, movies_version, template_hash), the hash also
+    covering FRAGMENT_FORMAT.
+    """
+    template_hash = hashlib.sha1(
+        f"{FRAGMENT_FORMAT}\0{template_html}".encode("utf-8")
+    ).hexdigest()
+    with engine.begin() as connection:
+        if force:
+            connection.execute(text("DELETE FROM site_fragments"))
+        movies_version = connection.execute(
+            text("SELECT version FROM movies_version")
+        ).scalar_one()
+        last_build = connection.execute(
+            text(
+                "SELECT movies_version, template_hash FROM site_builds "
+                "WHERE output_path = :output_path"
+            ),
+            {"output_path": build_key},
+        ).fetchone()
+
+    needed = (force or not os.path.exists(build_key)
+              or last_build != (movies_version, template_hash))
+    return needed, movies_version, template_hash
+
+
+def finish_build(build_key, movies_version, template_hash):
+    """Records a completed build (see start_build)."""
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT OR REPLACE INTO site_builds "
+                "(output_path, movies_version, template_hash) "
+                "VALUES (:output_path, :movies_version, :template_hash)"
+            ),
+            {"output_path": build_key, "movies_version": movies_version,
+             "template_hash": template_hash},
         )
-        output += f'    <h3>{movie.get("title", "")}</h3>\n'
-        output += f'    <p>{movie.get("year", "")}</p>\n'
-        output += f'    <p>{movie.get("rating", "")}</p>\n'
-        output += "</li>\n"
-    return output
+
+
+def update_search_index(force=False):
+    """
+    Updates the static search index when the movies changed since it
+    was last built; only the shards of changed movies are rewritten.
+
+    :param force: Rebuild the whole index even if nothing changed.
+    :return: Stats from search_index.build_search_index(), or None if the
+    index was up to date.
+    """
+    needed, movies_version, template_hash = start_build(
+        search_index.INDEX_DIR, search_index.INDEX_FORMAT, False
+    )
+    if not (needed or force):
+        return None
+    stats = search_index.build_search_index(engine, full=force)
+    finish_build(search_index.INDEX_DIR, movies_version, template_hash)
+    return stats
 
 
 # Step 3. Write this new string to the 'new' html file
-def write_html_template(html_data):
+def write_html_template(html_data, output_path="movies.html"):
     """
-    Writes the given HTML content (str) to the 'movies.html' file.
+    Writes HTML content to a file atomically.
 
-    :param html_data: A string containing the full HTML content (str)
-    to be written to the file.
+    The content goes to a temporary file next to the target through a
+    buffered writer, which is then renamed over the target, so a failed
+    build never leaves a half-written page behind.
+
+    :param html_data: The full HTML content (str), or an iterable of
+    string chunks written as they are produced.
+    :param output_path: File to write, 'movies.html' by default.
     :return: None
     """
-    with open("movies.html", "w", encoding="utf-8") as fileobject:
-        fileobject.write(html_data)
+    if isinstance(html_data, str):
+        html_data = (html_data,)
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(
+            temp_path, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE
+        ) as fileobject:
+            for chunk in html_data:
+                fileobject.write(chunk)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
 
-def generate_website():
+def generate_website(force=False, output_path="movies.html", workers=1):
     """
     Generate the movies HTML website.
 
-    Reads the HTML template, fills it with movie data from the database,
-    and writes the final HTML to 'movies.html'.
+    Reads the HTML template and streams it to 'movies.html' with one list
+    item per movie, so memory use does not grow with the size of the
+    catalog. The static search index under search/ is kept up to date
+    alongside it.
+
+    Builds are incremental: nothing is written when neither the movies
+    (tracked by the trigger-maintained movies_version counter) nor the
+    template changed since the last build, and otherwise only movies
+    whose cached fragment was invalidated are rendered again.
+
+    :param force: Re-render every movie even if nothing changed, e.g.
+    after poster files were deleted.
+    :param output_path: File to write.
+    :param workers: Processes rendering movies in parallel.
+    :return: dict with the number of "rendered" movies and whether the
+    build was "skipped".
     """
-    movies_from_database = []
-    with engine.connect() as connection:
-        result = connection.execute(text("""SELECT * FROM movies"""))
-        for row in result:
-            movies_dict = {
-                "title": row[1],
-                "year": row[2],
-                "rating": row[3],
-                "poster_url": row[4],
-            }
-            movies_from_database.append(movies_dict)
+    storage.flush_writes()
+
     # Read HTML template
-    movies_template_path = "templates/index_template.html"
-    movies_template_html = read_html_template(movies_template_path)
-    print(movies_template_html)
+    movies_template = load_template("templates/index_template.html")
+    needed, movies_version, template_hash = start_build(
+        output_path, movies_template.source, force
+    )
+    update_search_index(force)
+    if not needed:
+        print(f"{Fore.GREEN}Website is up to date.{Style.RESET_ALL}")
+        return {"rendered": 0, "skipped": True}
+
+    rendered = render_missing_fragments(workers)
 
     # Step 3:
-    final_html = movies_template_html.replace(
-        "__TEMPLATE_TITLE__", "My Movie App"
-    ).replace("__TEMPLATE_MOVIE_GRID__", serialize_movies_data(movies_from_database))
-    print(final_html)
-    write_html_template(final_html)
+    write_html_template(
+        movies_template.render(
+            title="My Movie App", movie_grid=iter_cached_movie_items()
+        ),
+        output_path,
+    )
+    finish_build(output_path, movies_version, template_hash)
+
+    print(f"{Fore.GREEN}{Style.BRIGHT}Website was generated successfully "
+          f"({rendered} movies rendered).{Style.RESET_ALL}")
+    return {"rendered": rendered, "skipped": False}
+
+
+def list_site_listings():
+    """
+    Describes every listing of the paged site, counted and ordered in SQL.
+
+    :return: List of (slug, heading, where, params, order_by, count)
+    tuples: all movies by id, then one per decade by year, then one per
+    rating band from best to worst.
+    """
+    with engine.connect() as connection:
+        total = connection.execute(text("SELECT COUNT(*) FROM movies")).scalar_one()
+        decades = connection.execute(
+            text(
+                "SELECT year / 10 * 10 AS decade, COUNT(*) FROM movies "
+                "GROUP BY decade ORDER BY decade"
+            )
+        ).fetchall()
+        bands = connection.execute(
+            text(
+                "SELECT MIN(CAST(rating AS INTEGER), :top) AS band, COUNT(*) "
+                "FROM movies GROUP BY band ORDER BY band DESC"
+            ),
+            {"top": TOP_RATING_BAND},
+        ).fetchall()
+
+    listings = [("page", "All movies", "1", {}, "m.id", total)]
+    for decade, count in decades:
+        listings.append((
+            f"decade-{decade}", f"{decade}s",
+            "m.year >= :start AND m.year < :end",
+            {"start": decade, "end": decade + 10},
+            "m.year, m.id", count,
+        ))
+    for band, count in bands:
+        # The top band also holds perfect 10s
+        high = band + 1 if band < TOP_RATING_BAND else band + 2
+        heading = (f"Rated {band}+" if band == TOP_RATING_BAND
+                   else f"Rated {band} to {band + 1}")
+        listings.append((
+            f"rating-{band}", heading,
+            "m.rating >= :low AND m.rating < :high",
+            {"low": band, "high": high},
+            "m.rating DESC, m.id", count,
+        ))
+    return listings
+
+
+def render_pagination(link_dir, slug, page, page_count):
+    """
+    Renders prev/next links for one page of a listing.
+
+    :param link_dir: Directory of the pages, relative to the site root.
+    :param slug: Listing name; page files are <slug>-<page>.html.
+    :param page: Current page number, starting at 1.
+    :param page_count: Number of pages in the listing.
+    :return: HTML <nav> element, as Markup.
+    """
+    def link(number, label):
+        return f'<a href="{html.escape(link_dir)}/{slug}-{number}.html">{label}</a>'
+
+    previous_link = link(page - 1, "&laquo; Previous") if page > 1 else ""
+    next_link = link(page + 1, "Next &raquo;") if page < page_count else ""
+    return Markup(
+        '<nav class="pagination">\n'
+        f"    {previous_link}\n"
+        f"    <span>Page {page} of {page_count}</span>\n"
+        f"    {next_link}\n"
+        f'    <a href="{html.escape(link_dir)}/index.html">All listings</a>\n'
+        "</nav>"
+    )
+
+
+def render_site_index(link_dir, listings):
+    """
+    Renders the links of the site index page.
+
+    :param link_dir: Directory of the pages, relative to the site root.
+    :param listings: Listings from list_site_listings().
+    :return: HTML with one list of links per kind of listing, as Markup.
+    """
+    sections = {"page": "All movies", "decade": "By decade", "rating": "By rating"}
+    output = []
+    for kind, heading in sections.items():
+        output.append(f"<h2>{heading}</h2>\n    <ul>\n")
+        for slug, listing_heading, _, _, _, count in listings:
+            if slug.split("-")[0] == kind:
+                output.append(
+                    f'        <li><a href="{html.escape(link_dir)}/{slug}-1.html">'
+                    f"{html.escape(listing_heading)}</a> ({count})</li>\n"
+                )
+        output.append("    </ul>\n    ")
+    return Markup("".join(output))
+
+
+def write_listing(listing, page_size, page_template, output_dir, values):
+    """
+    Writes one listing as numbered pages of page_size movies each.
+
+    All pages come from a single ordered, streamed query.
+
+    :param listing: One listing from list_site_listings().
+    :param page_size: Movies per page.
+    :param page_template: Compiled page template.
+    :param output_dir: Directory for the pages.
+    :param values: Slot values shared by every page ("root", "link_dir",
+    "build_time").
+    :return: File names written.
+    """
+    slug, heading, where, params, order_by, count = listing
+    page_count = max(1, math.ceil(count / page_size))
+    written = []
+    with engine.connect() as connection:
+        fragments = iter(iter_cached_fragments(connection, where, params, order_by))
+        for page in range(1, page_count + 1):
+            file_name = f"{slug}-{page}.html"
+            write_html_template(
+                page_template.render(
+                    title=f"My Movie App: {heading}",
+                    navigation=render_pagination(
+                        values["link_dir"], slug, page, page_count
+                    ),
+                    movie_grid=itertools.islice(fragments, page_size),
+                    movie_count=count,
+                    page=page,
+                    page_count=page_count,
+                    **values,
+                ),
+                os.path.join(output_dir, file_name),
+            )
+            written.append(file_name)
+    return written
+
+
+def generate_paged_site(page_size=DEFAULT_PAGE_SIZE, pages=None,
+                        output_dir="movies", force=False, workers=1):
+    """
+    Generate the movies website as a directory of smaller pages.
+
+    Writes <output_dir>/page-N.html with page_size movies each, the same
+    split per decade (decade-1990-N.html) and per rating band
+    (rating-8-N.html), and an index.html linking all of them. Builds are
+    incremental in the same way as generate_website().
+
+    :param page_size: Movies per page.
+    :param pages: Split all movies into this many pages instead; overrides
+    page_size.
+    :param output_dir: Directory for the pages, inside the site root.
+    :param force: Re-render every movie even if nothing changed.
+    :param workers: Processes rendering movies in parallel.
+    :return: dict with the number of "rendered" movies, "pages" written
+    and whether the build was "skipped".
+    """
+    storage.flush_writes()
+
+    page_template = load_template("templates/page_template.html")
+    index_template = load_template("templates/site_index_template.html")
+
+    if pages:
+        total = storage.count_movies()
+        page_size = max(1, math.ceil(total / pages))
+
+    values = {
+        "root": os.path.relpath(".", output_dir).replace(os.sep, "/"),
+        "link_dir": os.path.relpath(output_dir, ".").replace(os.sep, "/"),
+    }
+    needed, movies_version, template_hash = start_build(
+        output_dir,
+        f"{page_template.source}{index_template.source}{page_size}{values}",
+        force,
+    )
+    update_search_index(force)
+    if not needed:
+        print(f"{Fore.GREEN}Website is up to date.{Style.RESET_ALL}")
+        return {"rendered": 0, "pages": 0, "skipped": True}
+
+    os.makedirs(output_dir, exist_ok=True)
+    rendered = render_missing_fragments(workers)
+
+    values["build_time"] = datetime.now().strftime(BUILD_TIME_FORMAT)
+    listings = list_site_listings()
+    written = {"index.html"}
+    for listing in listings:
+        written.update(write_listing(
+            listing, page_size, page_template, output_dir, values
+        ))
+    write_html_template(
+        index_template.render(
+            title="My Movie App",
+            listings=render_site_index(values["link_dir"], listings),
+            movie_count=listings[0][5],
+            **values,
+        ),
+        os.path.join(output_dir, "index.html"),
+    )
+
+    # Pages left over from a build with more movies or a smaller page size
+    for file_name in os.listdir(output_dir):
+        if PAGE_FILE_PATTERN.match(file_name) and file_name not in written:
+            os.remove(os.path.join(output_dir, file_name))
+
+    finish_build(output_dir, movies_version, template_hash)
+
+    print(f"{Fore.GREEN}{Style.BRIGHT}Website was generated successfully "
+          f"({len(written)} pages in {output_dir}/, {rendered} movies rendered)."
+          f"{Style.RESET_ALL}")
+    return {"rendered": rendered, "pages": len(written), "skipped": False}
+
+
+if __name__ == "__main__":
+    # Parallel render benchmark:
+    # python website_generator.py [number_of_movies] [max_workers]
+    import sys
+    import tempfile
+    import time
+    from storage.migrations import run_migrations
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = get_engine(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+        run_migrations(engine)
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO movies (title, year, rating, poster_url) "
+                    "VALUES (:title, :year, :rating, '')"
+                ),
+                [
+                    {"title": f"Movie Title {i}", "year": 1900 + i % 125,
+                     "rating": (i % 100) / 10}
+                    for i in range(count)
+                ],
+            )
+
+        print(f"{count} movies")
+        baseline = None
+        for workers in range(1, max_workers + 1):
+            with engine.begin() as connection:
+                connection.execute(text("DELETE FROM site_fragments"))
+            start = time.perf_counter()
+            render_missing_fragments(workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:2} workers: {elapsed:6.2f} s "
+                  f"({baseline / elapsed:.1f}x)")
+        engine.dispose()